@@ -0,0 +1,145 @@
+import gzip
+import json
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+
+# Artifacts beyond this are evicted oldest first
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+def safe_name(name):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "test_case"
+
+class ArtifactStore:
+    # Evidence of failed steps under projects/Artifacts/<run>/<test case>/: the screenshot, the
+    # gzipped page source and a JSON file with the URL and error. Only the browser calls happen
+    # on the test thread, compression and disk writes are done by a background writer.
+    def __init__(self, folder, max_bytes=DEFAULT_MAX_BYTES, run=None, logger=None):
+        self.folder = folder
+        self.logger = logger  # Told about captures that could not be written, from the writer thread
+        self.max_bytes = max_bytes
+        self.run = run
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.writer = None
+        self.files = None  # (mtime, path, size) oldest first, built on the first write
+        self.total = 0
+
+    def rotate(self):
+        # Later captures go to a new run folder
+        with self.lock:
+            self.run = None
+
+    def run_folder(self):
+        with self.lock:
+            if self.run is None:
+                self.run = time.strftime("run_%Y%m%d_%H%M%S", time.localtime())
+            return os.path.join(self.folder, self.run)
+
+    def capture(self, driver, test_case, number, block_type, error):
+        # Returns the path the artifacts are written to, without an extension
+        artifact = {"test_case": test_case, "step": number, "block_type": block_type, "error": error,
+                    "time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())}
+        screenshot = source = None
+        # A dead browser may still answer some of these
+        try:
+            artifact["url"] = driver.current_url
+        except Exception as e:
+            artifact["url_error"] = str(e)
+        try:
+            screenshot = driver.get_screenshot_as_png()
+        except Exception as e:
+            artifact["screenshot_error"] = str(e)
+        try:
+            source = driver.page_source
+        except Exception as e:
+            artifact["page_source_error"] = str(e)
+
+        stem = os.path.join(self.run_folder(), safe_name(os.path.splitext(test_case)[0]), f"step_{number:03d}_{safe_name(block_type)}")
+        with self.lock:
+            if self.writer is None:
+                self.writer = threading.Thread(target=self.write_loop, daemon=True)
+                self.writer.start()
+        self.queue.put((stem, artifact, screenshot, source))
+        return stem
+
+    def write_loop(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                self.write(*item)
+            except Exception as e:
+                self.log(f"Failed to write failure artifacts: {e}")
+            finally:
+                self.queue.task_done()
+
+    def write(self, stem, artifact, screenshot, source):
+        os.makedirs(os.path.dirname(stem), exist_ok=True)
+        written = []
+        if screenshot:
+            # PNG is already compressed, it is written as is
+            with open(stem + ".png", 'wb') as file:
+                file.write(screenshot)
+            written.append(stem + ".png")
+        if source is not None:
+            with gzip.open(stem + ".html.gz", 'wt', encoding='utf-8', compresslevel=6) as file:
+                file.write(source)
+            written.append(stem + ".html.gz")
+        with open(stem + ".json", 'w') as file:
+            json.dump(artifact, file, indent=2)
+        written.append(stem + ".json")
+        self.account(written)
+
+    def account(self, paths):
+        if self.files is None:
+            self.files = deque(sorted(self.scan()))
+            self.total = sum(size for _, _, size in self.files)
+        else:
+            for path in paths:
+                size = os.path.getsize(path)
+                self.files.append((os.path.getmtime(path), path, size))
+                self.total += size
+        # The newest capture is kept even if it is over the cap on its own
+        while self.total > self.max_bytes and len(self.files) > len(paths):
+            _, path, size = self.files.popleft()
+            self.total -= size
+            try:
+                os.remove(path)
+                self.prune(os.path.dirname(path))
+            except OSError:
+                pass
+
+    def scan(self):
+        for root, _, file_names in os.walk(self.folder):
+            for file_name in file_names:
+                path = os.path.join(root, file_name)
+                try:
+                    yield os.path.getmtime(path), path, os.path.getsize(path)
+                except OSError:
+                    pass
+
+    def prune(self, folder):
+        # Removes test case and run folders left empty by eviction
+        while os.path.abspath(folder) != os.path.abspath(self.folder) and not os.listdir(folder):
+            os.rmdir(folder)
+            folder = os.path.dirname(folder)
+
+    def flush(self):
+        self.queue.join()
+
+    def log(self, message):
+        if self.logger is not None:
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+            self.logger(f"[{timestamp}] {message}")
+
+    def close(self):
+        with self.lock:
+            writer, self.writer = self.writer, None
+        if writer is not None:
+            self.queue.put(None)
+            writer.join()
@@ -0,0 +1,59 @@
+import argparse
+import time
+import tkinter as tk
+from test_case_component import AutomatedTestingApp
+
+# Replays synthetic <B1-Motion> events on a "Retrieve data" block and reports how many
+# events the canvas absorbs per second and how many actual redraws they turned into.
+# Needs a display; run with: python bench_drag.py --blocks 300 --events 5000
+
+class DragEvent:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+def run_benchmark(blocks, events, events_per_frame):
+    root = tk.Tk()
+    root.geometry("900x700")
+    panel = tk.Frame(root)
+    panel.pack(fill=tk.BOTH, expand=True)
+    app = AutomatedTestingApp(root, panel, None, lambda message: None, lambda: None)
+
+    for index in range(blocks):
+        app.create_draggable_block(20, 20 + index * 110, "Retrieve data")
+    root.update()
+
+    redraws = [0]
+    flush_drag = app.flush_drag
+    def counting_flush():
+        redraws[0] += 1
+        flush_drag()
+    app.flush_drag = counting_flush
+
+    app.on_canvas_click(DragEvent(30, 30))
+    started = time.perf_counter()
+    for index in range(events):
+        app.on_canvas_drag(DragEvent(30 + index % 200, 30 + index % 150))
+        # Let Tk process pending timers the way the main loop would between bursts of motion
+        if index % events_per_frame == 0:
+            root.update()
+    app.on_canvas_release(DragEvent(30, 30))
+    root.update()
+    elapsed = time.perf_counter() - started
+
+    root.destroy()
+    return elapsed, redraws[0]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark block dragging on the test case canvas.")
+    parser.add_argument("--blocks", type=int, default=200, help="blocks on the canvas")
+    parser.add_argument("--events", type=int, default=5000, help="motion events to replay")
+    parser.add_argument("--events-per-frame", type=int, default=4, help="motion events delivered between main loop updates")
+    args = parser.parse_args()
+
+    elapsed, redraws = run_benchmark(args.blocks, args.events, args.events_per_frame)
+    print(f"{args.events} motion events on {args.blocks} blocks in {elapsed:.3f}s")
+    print(f"{args.events / elapsed:.0f} events/s, {redraws} redraws ({args.events / max(redraws, 1):.1f} events per redraw)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Starts the application in a fresh interpreter and reports the time until the first window has
+# been drawn, plus which heavy libraries were imported on the way. Each sample is a new process
+# so nothing is already in sys.modules. Needs a display; run with:
+#   python bench_startup.py --runs 5 --target 1.5
+# Exits 1 if the median is over the target.
+
+HEAVY_MODULES = ["selenium", "pymysql", "psycopg2", "pyodbc", "fpdf", "numpy", "PIL"]
+
+CHILD_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import tkinter as tk
+import main
+imported = time.perf_counter()
+root = tk.Tk()
+app = main.AutomatedTestingApp(root)
+root.update()
+shown = time.perf_counter()
+print(json.dumps({"import": imported - started, "window": shown - started,
+                  "loaded": [name for name in sys.argv[1:] if name in sys.modules]}))
+app.on_closing()
+"""
+
+def measure():
+    output = subprocess.run([sys.executable, "-c", CHILD_SCRIPT] + HEAVY_MODULES, capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark application startup time.")
+    parser.add_argument("--runs", type=int, default=5, help="startups to measure")
+    parser.add_argument("--target", type=float, default=None, help="seconds the median time to first window has to stay under")
+    args = parser.parse_args()
+
+    samples = []
+    for index in range(args.runs):
+        sample = measure()
+        samples.append(sample)
+        print(f"run {index + 1}: imports {sample['import']:.3f}s, first window {sample['window']:.3f}s")
+
+    windows = sorted(sample["window"] for sample in samples)
+    median = windows[len(windows) // 2]
+    print(f"first window: median {median:.3f}s, best {windows[0]:.3f}s, worst {windows[-1]:.3f}s over {len(samples)} run(s)")
+    loaded = sorted(set(name for sample in samples for name in sample["loaded"]))
+    print(f"heavy modules loaded at startup: {', '.join(loaded) if loaded else 'none'}")
+
+    if args.target is not None and median > args.target:
+        print(f"Over target: {median:.3f}s > {args.target:.3f}s")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+import tkinter as tk
+
+ELEMENT_OPTIONS = ["NAME", "ID", "CLASS_NAME", "CSS_SELECTOR", "LINK_TEXT", "PARTIAL_LINK_TEXT", "TAG_NAME", "XPATH"]
+
+class Field:
+    __slots__ = ("kind", "dx", "dy", "width", "placeholder", "options", "default", "show")
+
+    # kind is "combobox" or "entry"; entries with a placeholder select it all on focus
+    def __init__(self, kind, dx, dy, width, placeholder=None, options=None, default=0, show=None):
+        self.kind = kind
+        self.dx = dx
+        self.dy = dy
+        self.width = width
+        self.placeholder = placeholder
+        self.options = options
+        self.default = default
+        self.show = show
+
+    def initial_value(self):
+        if self.kind == "combobox":
+            return self.options[self.default]
+        return self.placeholder or ""
+
+class Block:
+    # values is the data model; widgets/windows only exist while the block is materialized on screen
+    __slots__ = ("block_type", "tag", "rect", "text_tag", "items", "widgets", "windows", "values")
+
+    # Layout of the component, FIELDS are listed in the order their values are saved
+    TYPE = None
+    WIDTH = 120
+    HEIGHT = 40
+    LABEL_X = 60
+    LABEL_Y = 20
+    FIELDS = ()
+    EXTRA_TEXTS = ()
+
+    def __init__(self, block_type, tag, rect, text_tag):
+        self.block_type = block_type
+        self.tag = tag
+        self.rect = rect
+        self.text_tag = text_tag
+        self.items = [rect, text_tag]
+        self.widgets = []
+        self.windows = []
+        self.values = [field.initial_value() for field in self.FIELDS]
+
+    def is_materialized(self):
+        return bool(self.widgets)
+
+    def get_values(self):
+        if self.widgets:
+            return [widget.get() for widget in self.widgets]
+        return list(self.values)
+
+    def set_values(self, values):
+        self.values = list(values)
+        for field, widget, value in zip(self.FIELDS, self.widgets, values):
+            if field.kind == "combobox":
+                widget.set(value)
+            else:
+                widget.delete(0, tk.END)
+                widget.insert(0, value)
+
+    def sync_values(self):
+        # Copies what was typed into the widgets back into the data model
+        if self.widgets:
+            self.values = [widget.get() for widget in self.widgets]
+
+class InputBlock(Block):
+    __slots__ = ()
+    TYPE = "Input by"
+    WIDTH = 560
+    HEIGHT = 50
+    LABEL_X = 40
+    LABEL_Y = 25
+    FIELDS = (
+        Field("combobox", 130, 25, 15, options=ELEMENT_OPTIONS),
+        Field("entry", 285, 25, 30, placeholder="element identifier"),
+        Field("entry", 460, 25, 25, placeholder="input"),
+    )
+
+class ClickBlock(Block):
+    __slots__ = ()
+    TYPE = "Click"
+    WIDTH = 530
+    HEIGHT = 50
+    LABEL_X = 40
+    LABEL_Y = 25
+    FIELDS = (
+        Field("combobox", 130, 25, 15, options=ELEMENT_OPTIONS),
+        Field("entry", 347, 25, 50, placeholder="element identifier"),
+    )
+
+class DropdownOptionBlock(Block):
+    __slots__ = ()
+    TYPE = "Dropdown option"
+    WIDTH = 660
+    HEIGHT = 50
+    LABEL_X = 65
+    LABEL_Y = 25
+    FIELDS = (
+        Field("combobox", 180, 25, 15, options=ELEMENT_OPTIONS),
+        Field("entry", 360, 25, 35, placeholder="element identifier"),
+        Field("entry", 560, 25, 25, placeholder="input"),
+    )
+
+class RadioButtonBlock(Block):
+    __slots__ = ()
+    TYPE = "Radio button"
+    WIDTH = 530
+    HEIGHT = 50
+    LABEL_X = 65
+    LABEL_Y = 25
+    FIELDS = (
+        Field("combobox", 180, 25, 15, options=ELEMENT_OPTIONS),
+        Field("entry", 360, 25, 35, placeholder="element identifier"),
+    )
+
+class StaticContentBlock(Block):
+    __slots__ = ()
+    TYPE = "Static content"
+    WIDTH = 700
+    HEIGHT = 50
+    LABEL_X = 65
+    LABEL_Y = 25
+    FIELDS = (
+        Field("combobox", 152, 25, 10, options=["Text", "Image", "Icon", "Visual"]),
+        Field("combobox", 260, 25, 15, options=ELEMENT_OPTIONS),
+        Field("entry", 420, 25, 30, placeholder="element identifier"),
+        Field("entry", 600, 25, 25, placeholder="input"),
+    )
+
+class LaunchWebBlock(Block):
+    __slots__ = ()
+    TYPE = "Launch Web:"
+    WIDTH = 400
+    HEIGHT = 50
+    LABEL_X = 60
+    LABEL_Y = 25
+    FIELDS = (
+        Field("entry", 250, 25, 45),
+    )
+
+class DelayBlock(Block):
+    __slots__ = ()
+    TYPE = "Delay:"
+    WIDTH = 200
+    HEIGHT = 50
+    LABEL_X = 40
+    LABEL_Y = 25
+    FIELDS = (
+        Field("entry", 97, 25, 10),
+    )
+    EXTRA_TEXTS = (("second(s)", 160, 25),)
+
+class NavigateBlock(Block):
+    __slots__ = ()
+    TYPE = "Navigate"
+    WIDTH = 200
+    HEIGHT = 50
+    LABEL_X = 50
+    LABEL_Y = 25
+    FIELDS = (
+        Field("combobox", 140, 25, 10, options=["Backward", "Forward", "Refresh"]),
+    )
+
+class DatabaseBlock(Block):
+    __slots__ = ()
+    TYPE = "Database"
+    WIDTH = 500
+    HEIGHT = 80
+    LABEL_X = 50
+    LABEL_Y = 25
+    FIELDS = (
+        Field("combobox", 150, 29, 19, options=["MySQL", "PostgreSQL", "Microsoft SQL Server"]),
+        Field("entry", 280, 25, 17, placeholder="Host/Server"),
+        Field("entry", 410, 25, 17, placeholder="Database Name"),
+        Field("entry", 280, 55, 17, placeholder="Username"),
+        Field("entry", 410, 55, 17, placeholder="Password", show="*"),
+    )
+
+class RetrieveDataBlock(Block):
+    __slots__ = ()
+    TYPE = "Retrieve data"
+    WIDTH = 620
+    HEIGHT = 100
+    LABEL_X = 60
+    LABEL_Y = 35
+    FIELDS = (
+        Field("entry", 148, 35, 15, placeholder="SELECT data"),
+        Field("entry", 250, 35, 15, placeholder="FROM table"),
+        Field("entry", 350, 35, 15, placeholder="WHERE column1"),
+        Field("entry", 450, 35, 15, placeholder="WHERE column2"),
+        Field("entry", 550, 35, 15, placeholder="WHERE column3"),
+        Field("entry", 350, 65, 15, placeholder="Value 1"),
+        Field("entry", 450, 65, 15, placeholder="Value 2"),
+        Field("entry", 550, 65, 15, placeholder="Value 3"),
+    )
+
+class WaitUntilBlock(Block):
+    __slots__ = ()
+    TYPE = "Wait until"
+    WIDTH = 660
+    HEIGHT = 80
+    LABEL_X = 50
+    LABEL_Y = 25
+    FIELDS = (
+        Field("combobox", 170, 25, 16, options=["Element present", "Element visible", "Element clickable", "Element gone", "Text present", "URL changes"], default=1),
+        Field("combobox", 320, 25, 15, options=ELEMENT_OPTIONS),
+        Field("entry", 520, 25, 30, placeholder="element identifier"),
+        Field("entry", 220, 55, 30, placeholder="text / URL"),
+        Field("entry", 400, 55, 12, placeholder="Timeout (s)"),
+        Field("entry", 500, 55, 12, placeholder="Poll (s)"),
+    )
+
+class SetupFixtureBlock(Block):
+    # Marks the steps above it as a setup fixture whose browser state is reused by later runs
+    __slots__ = ()
+    TYPE = "Setup fixture"
+    WIDTH = 400
+    HEIGHT = 50
+    LABEL_X = 60
+    LABEL_Y = 25
+    FIELDS = (
+        Field("entry", 260, 25, 35, placeholder="fixture name"),
+    )
+
+BLOCK_TYPES = {block_class.TYPE: block_class for block_class in [
+    InputBlock,
+    ClickBlock,
+    DropdownOptionBlock,
+    RadioButtonBlock,
+    StaticContentBlock,
+    LaunchWebBlock,
+    DelayBlock,
+    NavigateBlock,
+    DatabaseBlock,
+    RetrieveDataBlock,
+    WaitUntilBlock,
+    SetupFixtureBlock,
+]}
+
+def block_class(block_type):
+    # Unknown types get a plain labelled box, as the canvas always did
+    return BLOCK_TYPES.get(block_type, Block)
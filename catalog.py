@@ -0,0 +1,137 @@
+import json
+import os
+import sqlite3
+import threading
+from run_profile import is_profile_file
+
+TEST_CASES = "Test Cases"
+TEST_SUITES = "Test Suites"
+
+ALL_RESULTS = "All results"
+PASSED = "Passed"
+FAILED = "Failed"
+NOT_RUN = "Not run"
+RESULT_FILTERS = [ALL_RESULTS, PASSED, FAILED, NOT_RUN]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    steps INTEGER NOT NULL DEFAULT 0,
+    block_types TEXT NOT NULL DEFAULT '',
+    urls TEXT NOT NULL DEFAULT '',
+    error TEXT,
+    last_result TEXT,
+    PRIMARY KEY (kind, name)
+)
+"""
+
+def describe_test_case(path):
+    # Returns (steps, block types, URLs) for a test case file
+    with open(path, 'r') as file:
+        blocks = json.load(file)
+    block_types = sorted(set(block['type'] for block in blocks))
+    urls = [block['values'][0] for block in blocks if block['type'] == "Launch Web:" and block['values'] and block['values'][0]]
+    return len(blocks), block_types, urls
+
+def describe_test_suite(path):
+    # Suites list test case paths, they are indexed by test case name
+    with open(path, 'r') as file:
+        test_cases = json.load(file)
+    return len(test_cases), [], [os.path.basename(test_case) for test_case in test_cases]
+
+class Catalog:
+    # SQLite index of the test case and suite folders at projects/catalog.db. update() only stats
+    # the folders and re-reads files whose mtime or size changed, listings and searches are
+    # queries with a limit so the side panel never loads a whole folder.
+    def __init__(self, path, folders):
+        self.folders = folders  # {TEST_CASES: folder, TEST_SUITES: folder}
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(SCHEMA)
+        self.connection.commit()
+
+    def update(self, kind):
+        # Returns (added or changed, removed)
+        folder = self.folders[kind]
+        found = {}
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".json") and not is_profile_file(entry.name):
+                    stat = entry.stat()
+                    found[entry.name] = (stat.st_mtime, stat.st_size)
+
+        with self.lock:
+            known = {name: (mtime, size) for name, mtime, size in self.connection.execute("SELECT name, mtime, size FROM entries WHERE kind = ?", (kind,))}
+        changed = [name for name, stamp in found.items() if known.get(name) != stamp]
+        removed = [name for name in known if name not in found]
+
+        rows = []
+        describe = describe_test_case if kind == TEST_CASES else describe_test_suite
+        for name in changed:
+            error = None
+            try:
+                steps, block_types, urls = describe(os.path.join(folder, name))
+            except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+                steps, block_types, urls, error = 0, [], [], str(e)
+            rows.append((kind, name, found[name][0], found[name][1], steps, "\n".join(block_types), "\n".join(urls), error))
+
+        if rows or removed:
+            with self.lock:
+                # The last result survives a re-index of a changed file
+                self.connection.executemany("""
+                    INSERT INTO entries (kind, name, mtime, size, steps, block_types, urls, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (kind, name) DO UPDATE SET mtime = excluded.mtime, size = excluded.size, steps = excluded.steps,
+                        block_types = excluded.block_types, urls = excluded.urls, error = excluded.error
+                """, rows)
+                self.connection.executemany("DELETE FROM entries WHERE kind = ? AND name = ?", [(kind, name) for name in removed])
+                self.connection.commit()
+        return len(changed), len(removed)
+
+    def where(self, kind, search, result):
+        clauses = ["kind = ?"]
+        parameters = [kind]
+        if search:
+            # Matches the file name, a block type, a URL or, for suites, a test case in the suite
+            pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            clauses.append("(name LIKE ? ESCAPE '\\' OR block_types LIKE ? ESCAPE '\\' OR urls LIKE ? ESCAPE '\\')")
+            parameters.extend([pattern] * 3)
+        if result == PASSED:
+            clauses.append("last_result = 'passed'")
+        elif result == FAILED:
+            clauses.append("last_result = 'failed'")
+        elif result == NOT_RUN:
+            clauses.append("last_result IS NULL")
+        return " AND ".join(clauses), parameters
+
+    def names(self, kind, search="", result=ALL_RESULTS, offset=0, limit=200):
+        where, parameters = self.where(kind, search, result)
+        with self.lock:
+            rows = self.connection.execute(f"SELECT name FROM entries WHERE {where} ORDER BY name COLLATE NOCASE LIMIT ? OFFSET ?", parameters + [limit, offset]).fetchall()
+        return [name for name, in rows]
+
+    def count(self, kind, search="", result=ALL_RESULTS):
+        where, parameters = self.where(kind, search, result)
+        with self.lock:
+            return self.connection.execute(f"SELECT COUNT(*) FROM entries WHERE {where}", parameters).fetchone()[0]
+
+    def details(self, kind, name):
+        with self.lock:
+            row = self.connection.execute("SELECT steps, block_types, urls, error, last_result FROM entries WHERE kind = ? AND name = ?", (kind, name)).fetchone()
+        if row is None:
+            return None
+        steps, block_types, urls, error, last_result = row
+        return {"steps": steps, "block_types": block_types.split("\n") if block_types else [], "urls": urls.split("\n") if urls else [],
+                "error": error, "last_result": last_result}
+
+    def record_result(self, name, passed):
+        # Results are recorded by test case file name, names the catalog does not know are ignored
+        with self.lock:
+            self.connection.execute("UPDATE entries SET last_result = ? WHERE kind = ? AND name = ?", ("passed" if passed else "failed", TEST_CASES, name))
+            self.connection.commit()
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
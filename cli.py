@@ -0,0 +1,288 @@
+import argparse
+import heapq
+import json
+import os
+import queue
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+from run_profile import profile_path
+from launch_profiles import load_profiles
+from run_history import RunHistory, STORED_ORDER, FAILED_FIRST, CHANGED_FIRST, FAILURES_ONLY
+
+# Runs suites and test cases without the Tk window, for CI:
+#   python cli.py Smoke.json --browser Chrome --headless --workers 4 --junit results.xml --json results.json
+# Exits 0 when every test case passed, 1 when any failed or a worker crashed and 2 when nothing
+# could be run.
+
+PROJECT_FOLDER = "projects"
+TEST_CASES_FOLDER = os.path.join(PROJECT_FOLDER, "Test Cases")
+TEST_SUITES_FOLDER = os.path.join(PROJECT_FOLDER, "Test Suites")
+LAUNCH_PROFILES_FOLDER = os.path.join(PROJECT_FOLDER, "Launch Profiles")
+ARTIFACTS_FOLDER = os.path.join(PROJECT_FOLDER, "Artifacts")
+HISTORY_PATH = os.path.join(PROJECT_FOLDER, "history.db")
+
+SUITE_ORDERS = {
+    "stored": STORED_ORDER,
+    "failed-first": FAILED_FIRST,
+    "changed-first": CHANGED_FIRST,
+    "failures-only": FAILURES_ONLY,
+}
+
+# Assumed duration (seconds) for test cases that have never been profiled
+DEFAULT_DURATION = 5.0
+
+def resolve_path(name, folder):
+    # Accepts a path, or a bare name from the projects folder with or without .json
+    for candidate in [name, os.path.join(folder, name), os.path.join(folder, f"{name}.json")]:
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+def collect_test_cases(suites, test_cases):
+    # Returns (suite name, test case path) pairs in run order
+    collected = []
+    for name in suites:
+        path = resolve_path(name, TEST_SUITES_FOLDER)
+        if path is None:
+            raise ValueError(f"Suite not found: {name}")
+        with open(path, 'r') as file:
+            suite = json.load(file)
+        suite_name = os.path.splitext(os.path.basename(path))[0]
+        collected.extend((suite_name, test_case) for test_case in suite)
+    for name in test_cases:
+        path = resolve_path(name, TEST_CASES_FOLDER)
+        if path is None:
+            raise ValueError(f"Test case not found: {name}")
+        collected.append(("Test cases", path))
+    return collected
+
+def schedule(collected, history, order):
+    # Reorders (suite, test case) pairs by the run history, a test case listed twice keeps both entries
+    ordered = history.order([test_case for _, test_case in collected], SUITE_ORDERS[order])
+    rank = {}
+    for position, test_case in enumerate(ordered):
+        rank.setdefault(test_case, position)
+    return sorted((entry for entry in collected if entry[1] in rank), key=lambda entry: rank[entry[1]])
+
+def recorded_duration(test_case):
+    # Duration from the run profile saved next to the test case by the last run
+    try:
+        with open(profile_path(test_case), 'r') as file:
+            profile = json.load(file)
+        return profile["total"] or None
+    except (OSError, ValueError, KeyError):
+        return None
+
+def balance(entries, shards):
+    # Longest test cases first, each onto the shard with the least work so far
+    durations = [recorded_duration(test_case) for _, _, test_case in entries]
+    known = [duration for duration in durations if duration]
+    fallback = sum(known) / len(known) if known else DEFAULT_DURATION
+    weighted = sorted(zip(entries, [duration or fallback for duration in durations]), key=lambda item: item[1], reverse=True)
+
+    heap = [(0.0, shard) for shard in range(shards)]
+    assigned = [[] for _ in range(shards)]
+    for entry, duration in weighted:
+        load, shard = heapq.heappop(heap)
+        assigned[shard].append(entry)
+        heapq.heappush(heap, (load + duration, shard))
+    # Each shard keeps suite order
+    return [sorted(shard) for shard in assigned if shard]
+
+def run_shard(shard_id, entries, webdriver_choice, headless, batch_steps, cache_elements, launch_profile, artifacts_run=None, report=None):
+    # Runs in a worker process, imports are local so the parent never loads selenium itself.
+    # The shard is a one-worker suite run: one browser session and one database pool for all of
+    # its test cases. report is called with each result as soon as it finishes.
+    from suite_runner import ParallelSuiteRunner
+    from session_pool import SessionPool
+    from artifacts import ArtifactStore
+
+    # Every shard writes into the same run folder, None when artifacts are turned off
+    artifacts = ArtifactStore(ARTIFACTS_FOLDER, run=artifacts_run, logger=lambda message: print(message, file=sys.stderr, flush=True)) if artifacts_run else None
+    session_pool = SessionPool(lambda message: None, max_idle=1, headless=headless)
+    results = []
+
+    def shard_result(result):
+        index, suite_name, test_case = entries[result["index"]]
+        if result["profile"] is not None:
+            try:
+                result["profile"].save(profile_path(test_case))
+            except OSError:
+                pass
+        results.append({
+            "index": index,
+            "suite": suite_name,
+            "test_case": test_case,
+            "passed": result["passed"],
+            "duration": result["duration"],
+            "shard": shard_id,
+            "log": result["log"],
+            "failure": result["failure"],
+        })
+        if report is not None:
+            report(results[-1])
+
+    try:
+        ParallelSuiteRunner(webdriver_choice, 1, lambda message: None, session_pool=session_pool, batch_steps=batch_steps, cache_elements=cache_elements,
+                            launch_profile=launch_profile, artifacts=artifacts, report=shard_result).run([test_case for _, _, test_case in entries])
+    finally:
+        session_pool.quit_all()
+        if artifacts is not None:
+            artifacts.close()
+    return results
+
+def crashed_results(shard_id, entries, results, error):
+    # Failed results for the test cases of a shard that stopped before reporting them
+    print(f"Error: shard {shard_id} crashed: {error}", file=sys.stderr, flush=True)
+    reported = {result["index"] for result in results}
+    failure = f"Shard {shard_id} crashed: {error}"
+    return [{"index": index, "suite": suite_name, "test_case": test_case, "passed": False, "duration": 0.0,
+             "shard": shard_id, "log": [failure], "failure": failure}
+            for index, suite_name, test_case in entries if index not in reported]
+
+def run_shards(shards, webdriver_choice, headless, batch_steps, cache_elements, launch_profile, artifacts_run, report):
+    # Returns (results, number of crashed shards). A shard that crashes fails its remaining test
+    # cases, the others still finish and get reported.
+    if len(shards) == 1:
+        results = []
+        def collect(result):
+            results.append(result)
+            report(result)
+        try:
+            run_shard(1, shards[0], webdriver_choice, headless, batch_steps, cache_elements, launch_profile, artifacts_run, collect)
+        except Exception as e:
+            for result in crashed_results(1, shards[0], results, e):
+                collect(result)
+            return results, 1
+        return results, 0
+
+    # Shards send each result through a managed queue as it finishes, so output streams while
+    # the other shards are still running
+    results = []
+    crashed = 0
+    expected = sum(len(shard) for shard in shards)
+    with Manager() as manager, ProcessPoolExecutor(max_workers=len(shards)) as executor:
+        finished = manager.Queue()
+        futures = [executor.submit(run_shard, shard_id + 1, shard, webdriver_choice, headless, batch_steps, cache_elements, launch_profile, artifacts_run, finished.put)
+                   for shard_id, shard in enumerate(shards)]
+        while len(results) < expected:
+            try:
+                result = finished.get(timeout=0.5)
+            except queue.Empty:
+                # A shard that died cannot send the rest of its results
+                if all(future.done() for future in futures):
+                    break
+                continue
+            report(result)
+            results.append(result)
+        for shard_id, (shard, future) in enumerate(zip(shards, futures)):
+            try:
+                future.result()
+            except Exception as e:
+                crashed += 1
+                for result in crashed_results(shard_id + 1, shard, results, e):
+                    report(result)
+                    results.append(result)
+    return results, crashed
+
+def print_result(result):
+    status = "PASSED" if result["passed"] else "FAILED"
+    print(f"=== {os.path.basename(result['test_case'])} (shard {result['shard']}) ===")
+    for line in result["log"]:
+        print(line)
+    print(f"=== {status} in {result['duration']:.2f}s ===", flush=True)
+
+def write_junit(results, path, elapsed):
+    root = ET.Element("testsuites", tests=str(len(results)), failures=str(sum(1 for result in results if not result["passed"])), time=f"{elapsed:.3f}")
+    suites = {}
+    for result in results:
+        suites.setdefault(result["suite"], []).append(result)
+    for suite_name, suite_results in suites.items():
+        suite = ET.SubElement(root, "testsuite", name=suite_name, tests=str(len(suite_results)),
+                              failures=str(sum(1 for result in suite_results if not result["passed"])),
+                              time=f"{sum(result['duration'] for result in suite_results):.3f}")
+        for result in suite_results:
+            case = ET.SubElement(suite, "testcase", classname=suite_name, name=os.path.splitext(os.path.basename(result["test_case"]))[0], time=f"{result['duration']:.3f}")
+            log = "\n".join(result["log"])
+            if not result["passed"]:
+                failure = ET.SubElement(case, "failure", message=result["failure"] or (result["log"][-1] if result["log"] else "Test case failed"))
+                failure.text = log
+            ET.SubElement(case, "system-out").text = log
+    ET.ElementTree(root).write(path, encoding="utf-8", xml_declaration=True)
+
+def write_json(results, path, elapsed):
+    data = {
+        "passed": all(result["passed"] for result in results),
+        "total": len(results),
+        "failed": sum(1 for result in results if not result["passed"]),
+        "duration": elapsed,
+        "results": results,
+    }
+    with open(path, 'w') as file:
+        json.dump(data, file, indent=2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run test suites and test cases without the GUI.")
+    parser.add_argument("suites", nargs="*", help="suite files, or suite names from projects/Test Suites")
+    parser.add_argument("--test-case", action="append", default=[], help="test case file or name from projects/Test Cases, may be repeated")
+    parser.add_argument("--browser", choices=["Chrome", "Edge", "Firefox"], default="Chrome", help="browser to run in")
+    parser.add_argument("--headless", action="store_true", help="run the browser without a window")
+    parser.add_argument("--profile", default="Default", help="launch profile from projects/Launch Profiles or a built-in one")
+    parser.add_argument("--batch", action="store_true", help="look up the elements of consecutive text and image verifications in one script")
+    parser.add_argument("--cache-elements", action="store_true", help="reuse element handles until the page changes")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes, test cases are balanced by their last recorded duration")
+    parser.add_argument("--junit", help="write JUnit XML results to this file")
+    parser.add_argument("--json", help="write JSON results to this file")
+    parser.add_argument("--order", choices=list(SUITE_ORDERS), default="stored", help="run order from the run history in projects/history.db, failures-only reruns last run's failures")
+    parser.add_argument("--no-artifacts", dest="artifacts", action="store_false", help="do not save screenshots and page sources of failed steps to projects/Artifacts")
+    args = parser.parse_args(argv)
+
+    try:
+        collected = collect_test_cases(args.suites, args.test_case)
+        profiles = load_profiles(LAUNCH_PROFILES_FOLDER, lambda message: print(message, file=sys.stderr))
+        if args.profile not in profiles:
+            raise ValueError(f"Launch profile not found: {args.profile}")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    if not collected:
+        print("Error: no test cases to run", file=sys.stderr)
+        return 2
+
+    os.makedirs(PROJECT_FOLDER, exist_ok=True)
+    history = RunHistory(HISTORY_PATH)
+    if args.order != "stored":
+        scheduled = schedule(collected, history, args.order)
+        print(f"Order {args.order}: running {len(scheduled)} of {len(collected)} test case(s)")
+        if not scheduled:
+            history.close()
+            return 0
+        collected = scheduled
+
+    entries = [(index, suite_name, test_case) for index, (suite_name, test_case) in enumerate(collected)]
+    shards = balance(entries, max(1, args.workers))
+    artifacts_run = time.strftime("run_%Y%m%d_%H%M%S", time.localtime()) if args.artifacts else None
+    started = time.perf_counter()
+    results, crashed = run_shards(shards, args.browser, args.headless, args.batch, args.cache_elements, profiles[args.profile], artifacts_run, print_result)
+    elapsed = time.perf_counter() - started
+    results.sort(key=lambda result: result["index"])
+    for result in results:
+        history.record(result["test_case"], result["passed"], result["duration"])
+    history.close()
+
+    failed = [result for result in results if not result["passed"]]
+    print(f"{len(results) - len(failed)} passed, {len(failed)} failed in {elapsed:.2f}s ({len(shards)} worker(s))")
+    for result in failed:
+        print(f"  FAILED: {result['test_case']}")
+
+    if args.junit:
+        write_junit(results, args.junit, elapsed)
+    if args.json:
+        write_json(results, args.json, elapsed)
+    return 1 if failed or crashed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
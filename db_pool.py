@@ -0,0 +1,158 @@
+import importlib
+import threading
+import time
+
+# Connector library for each database type, imported by the first connection of that type
+# so a machine without pyodbc can still use MySQL and PostgreSQL
+CONNECTORS = {
+    "MySQL": "pymysql",
+    "PostgreSQL": "psycopg2",
+    "Microsoft SQL Server": "pyodbc",
+}
+
+def load_connector(db_type):
+    if db_type not in CONNECTORS:
+        raise ValueError(f"Unsupported database type: {db_type}")
+    try:
+        return importlib.import_module(CONNECTORS[db_type])
+    except ImportError as e:
+        raise RuntimeError(f"{db_type} connections need the {CONNECTORS[db_type]} package: {e}")
+
+class ConnectionPool:
+    def __init__(self, idle_timeout=300):
+        self.idle_timeout = idle_timeout  # Idle connections older than this (seconds) are closed
+        self.lock = threading.Lock()
+        self.idle = {}
+        self.in_use = {}
+        self.sweeper = None  # Timer closing expired idle connections while nothing else uses the pool
+
+    def pool_key(self, db_type, connection_details):
+        return (db_type, connection_details['host'], connection_details['dbname'], connection_details['username'])
+
+    def acquire(self, db_type, connection_details):
+        # Returns (connection, reused)
+        self.close_idle()
+        key = self.pool_key(db_type, connection_details)
+        while True:
+            with self.lock:
+                connections = self.idle.get(key)
+                if not connections:
+                    break
+                connection, _ = connections.pop()
+            # The health check's SELECT is rolled back as well
+            if self.is_healthy(connection) and self.end_transaction(connection):
+                with self.lock:
+                    self.in_use[id(connection)] = (key, connection)
+                return connection, True
+            self.close(connection)
+
+        connection = self.connect(db_type, connection_details)
+        with self.lock:
+            self.in_use[id(connection)] = (key, connection)
+        return connection, False
+
+    def release(self, connection):
+        with self.lock:
+            entry = self.in_use.pop(id(connection), None)
+        # Connections run with autocommit off, ending the transaction drops the read snapshot
+        # so the next test case sees current rows and not the ones from this one's first SELECT
+        if entry is None or not self.end_transaction(connection):
+            self.close(connection)
+        else:
+            with self.lock:
+                self.idle.setdefault(entry[0], []).append((connection, time.monotonic()))
+        self.close_idle()
+        self.schedule_sweep()
+
+    def end_transaction(self, connection):
+        try:
+            connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    def schedule_sweep(self):
+        with self.lock:
+            if self.sweeper is not None or not any(self.idle.values()):
+                return
+            self.sweeper = threading.Timer(max(1, self.idle_timeout / 2), self.sweep)
+            self.sweeper.daemon = True
+            self.sweeper.start()
+
+    def sweep(self):
+        with self.lock:
+            self.sweeper = None
+        self.close_idle()
+        self.schedule_sweep()
+
+    def connect(self, db_type, connection_details):
+        connector = load_connector(db_type)
+        if db_type == "MySQL":
+            return connector.connect(
+                host=connection_details['host'],
+                user=connection_details['username'],
+                password=connection_details['password'],
+                database=connection_details['dbname']
+            )
+        elif db_type == "PostgreSQL":
+            return connector.connect(
+                host=connection_details['host'],
+                user=connection_details['username'],
+                password=connection_details['password'],
+                dbname=connection_details['dbname']
+            )
+        elif db_type == "Microsoft SQL Server":
+            connection_string = (
+                f"DRIVER={{ODBC Driver 17 for SQL Server}};"
+                f"SERVER={connection_details['host']};"
+                f"DATABASE={connection_details['dbname']};"
+                f"UID={connection_details['username']};"
+                f"PWD={connection_details['password']}"
+            )
+            return connector.connect(connection_string)
+        raise ValueError(f"Unsupported database type: {db_type}")
+
+    def is_healthy(self, connection):
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def close_idle(self):
+        now = time.monotonic()
+        expired = []
+        with self.lock:
+            for key, connections in self.idle.items():
+                keep = []
+                for connection, last_used in connections:
+                    if now - last_used > self.idle_timeout:
+                        expired.append(connection)
+                    else:
+                        keep.append((connection, last_used))
+                self.idle[key] = keep
+        for connection in expired:
+            self.close(connection)
+
+    def close_all(self):
+        with self.lock:
+            if self.sweeper is not None:
+                self.sweeper.cancel()
+                self.sweeper = None
+            connections = [connection for entries in self.idle.values() for connection, _ in entries]
+            connections.extend(connection for _, connection in self.in_use.values())
+            self.idle.clear()
+            self.in_use.clear()
+        for connection in connections:
+            self.close(connection)
+
+    def close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
@@ -0,0 +1,37 @@
+class ElementCache:
+    # Element handles for the page that is currently loaded, keyed by (By, identifier).
+    # Launch Web and Navigate clear it, after any other action that may have changed the page
+    # the URL is checked once before the next lookup. Handles that went stale are replaced by
+    # the runner with a fresh lookup.
+    def __init__(self):
+        self.elements = {}
+        self.url = None
+        self.dirty = True
+
+    def find(self, driver, by_type, element_identifier):
+        # Returns (element, hit)
+        if self.dirty:
+            url = driver.current_url
+            if url != self.url:
+                self.elements.clear()
+                self.url = url
+            self.dirty = False
+
+        key = (by_type, element_identifier)
+        element = self.elements.get(key)
+        if element is not None:
+            return element, True
+        element = driver.find_element(by_type, element_identifier)
+        self.elements[key] = element
+        return element, False
+
+    def discard(self, by_type, element_identifier):
+        self.elements.pop((by_type, element_identifier), None)
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def clear(self):
+        self.elements.clear()
+        self.url = None
+        self.dirty = True
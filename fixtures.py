@@ -0,0 +1,61 @@
+import threading
+
+CAPTURE_STORAGE_SCRIPT = """
+function copy(storage) {
+    var items = {};
+    for (var i = 0; i < storage.length; i++) {
+        var key = storage.key(i);
+        items[key] = storage.getItem(key);
+    }
+    return items;
+}
+return {local: copy(window.localStorage), session: copy(window.sessionStorage)};
+"""
+
+RESTORE_STORAGE_SCRIPT = """
+var local = arguments[0], session = arguments[1];
+for (var key in local) window.localStorage.setItem(key, local[key]);
+for (var key in session) window.sessionStorage.setItem(key, session[key]);
+"""
+
+class FixtureStore:
+    # Snapshots of what a setup fixture left behind (cookies, local/session storage and the URL),
+    # kept per browser session and fixture name. A snapshot is only reused while the fixture
+    # steps hash the same, and is dropped when the session pool quits the browser.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshots = {}
+
+    def get(self, driver, name, digest):
+        with self.lock:
+            snapshot = self.snapshots.get(driver, {}).get(name)
+        if snapshot is None or snapshot["digest"] != digest:
+            return None
+        return snapshot
+
+    def capture(self, driver, name, digest):
+        storage = driver.execute_script(CAPTURE_STORAGE_SCRIPT) or {}
+        snapshot = {
+            "digest": digest,
+            "url": driver.current_url,
+            "cookies": driver.get_cookies(),
+            "local": storage.get("local", {}),
+            "session": storage.get("session", {}),
+        }
+        with self.lock:
+            self.snapshots.setdefault(driver, {})[name] = snapshot
+        return snapshot
+
+    def restore(self, driver, snapshot):
+        # Cookies and storage can only be set for the origin that is loaded, the page is then
+        # reloaded so it starts with the restored state
+        driver.get(snapshot["url"])
+        driver.delete_all_cookies()
+        for cookie in snapshot["cookies"]:
+            driver.add_cookie(cookie)
+        driver.execute_script(RESTORE_STORAGE_SCRIPT, snapshot["local"], snapshot["session"])
+        driver.refresh()
+
+    def forget(self, driver):
+        with self.lock:
+            self.snapshots.pop(driver, None)
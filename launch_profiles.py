@@ -0,0 +1,102 @@
+import json
+import os
+
+PAGE_LOAD_STRATEGIES = ["normal", "eager", "none"]
+
+class LaunchProfile:
+    # Browser options applied when a session is started. Profiles are saved as JSON under
+    # projects/Launch Profiles, the file name (without .json) is the profile name.
+    def __init__(self, name, headless=False, window_size="", page_load_strategy="normal", block_images=False, block_media=False, cache_dir="", extra_args=None):
+        if page_load_strategy not in PAGE_LOAD_STRATEGIES:
+            raise ValueError(f"Unsupported page load strategy: {page_load_strategy}")
+        self.name = name
+        self.headless = headless
+        self.window_size = window_size  # "1920x1080", empty for the browser default
+        self.window()  # Checked here so a bad size is reported on load, not at every launch
+        self.page_load_strategy = page_load_strategy
+        self.block_images = block_images
+        self.block_media = block_media
+        self.cache_dir = cache_dir
+        self.extra_args = list(extra_args or [])
+
+    def to_dict(self):
+        return {
+            "headless": self.headless,
+            "window_size": self.window_size,
+            "page_load_strategy": self.page_load_strategy,
+            "block_images": self.block_images,
+            "block_media": self.block_media,
+            "cache_dir": self.cache_dir,
+            "extra_args": self.extra_args,
+        }
+
+    @classmethod
+    def from_dict(cls, name, data):
+        return cls(name, **data)
+
+    def key(self):
+        # Sessions are only reused for a profile with exactly the same options
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+    def window(self):
+        if not self.window_size:
+            return None
+        parts = str(self.window_size).lower().split("x")
+        if len(parts) != 2 or not all(part.strip().isdigit() and int(part) > 0 for part in parts):
+            raise ValueError(f"Unsupported window size: {self.window_size}, expected WIDTHxHEIGHT")
+        return int(parts[0]), int(parts[1])
+
+    def apply(self, webdriver_choice, options, headless=False):
+        options.page_load_strategy = self.page_load_strategy
+        window = self.window()
+        if webdriver_choice == "Firefox":
+            if headless or self.headless:
+                options.add_argument("-headless")
+            if window:
+                options.add_argument(f"--width={window[0]}")
+                options.add_argument(f"--height={window[1]}")
+            if self.block_images:
+                options.set_preference("permissions.default.image", 2)
+            if self.block_media:
+                options.set_preference("media.autoplay.default", 5)
+            if self.cache_dir:
+                options.set_preference("browser.cache.disk.parent_directory", os.path.abspath(self.cache_dir))
+        else:
+            # Chrome and Edge take the same Chromium switches
+            if headless or self.headless:
+                options.add_argument("--headless=new")
+            if window:
+                options.add_argument(f"--window-size={window[0]},{window[1]}")
+            if self.block_images:
+                options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+                options.add_argument("--blink-settings=imagesEnabled=false")
+            if self.block_media:
+                options.add_argument("--autoplay-policy=user-gesture-required")
+                options.add_argument("--mute-audio")
+            if self.cache_dir:
+                options.add_argument(f"--disk-cache-dir={os.path.abspath(self.cache_dir)}")
+        for argument in self.extra_args:
+            options.add_argument(argument)
+        return options
+
+# Always available, files with the same name in the profiles folder take precedence
+BUILT_IN_PROFILES = [
+    LaunchProfile("Default"),
+    LaunchProfile("Headless (fast)", headless=True, window_size="1920x1080", page_load_strategy="eager", block_images=True, block_media=True),
+]
+
+def load_profiles(folder, logger=None):
+    # Files that cannot be read are skipped and reported through logger
+    profiles = {profile.name: profile for profile in BUILT_IN_PROFILES}
+    if folder and os.path.isdir(folder):
+        for file_name in sorted(os.listdir(folder)):
+            if not file_name.endswith(".json"):
+                continue
+            name = os.path.splitext(file_name)[0]
+            try:
+                with open(os.path.join(folder, file_name), 'r') as file:
+                    profiles[name] = LaunchProfile.from_dict(name, json.load(file))
+            except (OSError, ValueError, TypeError) as e:
+                if logger is not None:
+                    logger(f"Skipping launch profile {file_name}: {e}")
+    return profiles
@@ -0,0 +1,156 @@
+import os
+import re
+import time
+import tkinter as tk
+from collections import deque
+from tkinter import ttk
+
+# Lines kept in memory and in the Text widget, older ones are only on disk
+DEFAULT_MAX_LINES = 5000
+
+ALL_LINES = "All lines"
+ERRORS_ONLY = "Errors only"
+ALL_TEST_CASES = "All test cases"
+
+# Lines containing any of these count as errors for the "Errors only" filter
+ERROR_MARKERS = ("Error", "error", "Failed", "FAILED", "mismatch", "Timed out", "stopped")
+
+# "=== login.json (worker 2) ===" starts a test case's lines, "=== PASSED in 1.20s ===" ends them
+TEST_CASE_HEADER = re.compile(r"^=== (.+?)(?: \(worker \d+\))? ===$")
+TEST_CASE_FOOTER = re.compile(r"^=== (PASSED|FAILED) in .* ===$")
+
+class LogEntry:
+    __slots__ = ("line", "test_case", "is_error")
+
+    def __init__(self, line, test_case, is_error):
+        self.line = line
+        self.test_case = test_case
+        self.is_error = is_error
+
+class LogView:
+    # Log panel backed by a ring buffer of max_lines entries. Lines arrive in batches, lines that
+    # fall out of the buffer are appended to a spill file under projects/Logs, and filtering
+    # rebuilds the widget from the buffer instead of searching the Text widget.
+    def __init__(self, parent, spill_folder, max_lines=DEFAULT_MAX_LINES):
+        self.spill_folder = spill_folder
+        self.max_lines = max_lines
+        self.entries = deque()
+        self.test_cases = []
+        self.current_test_case = None
+        self.shown = 0
+        self.spill_path = None
+        self.spill_file = None
+
+        self.frame = tk.Frame(parent, bg='lightgrey')
+
+        # Filter bar
+        self.filter_frame = tk.Frame(self.frame, bg='lightgrey')
+        self.filter_frame.pack(fill=tk.X, padx=10, pady=(0, 5))
+
+        self.mode_var = tk.StringVar(value=ALL_LINES)
+        self.mode_combobox = ttk.Combobox(self.filter_frame, textvariable=self.mode_var, values=[ALL_LINES, ERRORS_ONLY], state="readonly", width=12)
+        self.mode_combobox.pack(side=tk.LEFT, padx=(0, 5))
+        self.mode_combobox.bind("<<ComboboxSelected>>", lambda event: self.refresh())
+
+        self.test_case_var = tk.StringVar(value=ALL_TEST_CASES)
+        self.test_case_combobox = ttk.Combobox(self.filter_frame, textvariable=self.test_case_var, values=[ALL_TEST_CASES], state="readonly", width=30)
+        self.test_case_combobox.pack(side=tk.LEFT, padx=5)
+        self.test_case_combobox.bind("<<ComboboxSelected>>", lambda event: self.refresh())
+
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(self.filter_frame, textvariable=self.search_var, width=30)
+        self.search_entry.pack(side=tk.LEFT, padx=5)
+        self.search_entry.bind("<Return>", lambda event: self.refresh())
+
+        self.spill_label = tk.Label(self.filter_frame, text="", bg='lightgrey')
+        self.spill_label.pack(side=tk.RIGHT)
+
+        self.text = tk.Text(self.frame, height=8, state=tk.DISABLED)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.text.yview)
+        self.text.config(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y, padx=(0, 10))
+        self.text.pack(padx=(10, 0), fill=tk.BOTH, expand=True)
+
+    def add_lines(self, lines):
+        # One batch per UI tick: one widget insert, one trim and at most one scroll
+        entries = [self.make_entry(line) for line in lines]
+        self.entries.extend(entries)
+        overflow = len(self.entries) - self.max_lines
+        if overflow > 0:
+            self.spill([self.entries.popleft() for _ in range(overflow)])
+
+        shown = [entry.line for entry in entries if self.matches(entry)]
+        if shown:
+            follow = self.text.yview()[1] >= 1.0
+            self.text.config(state=tk.NORMAL)
+            self.text.insert(tk.END, "".join(line + "\n" for line in shown))
+            self.shown += len(shown)
+            if self.shown > self.max_lines:
+                self.text.delete("1.0", f"{self.shown - self.max_lines + 1}.0")
+                self.shown = self.max_lines
+            self.text.config(state=tk.DISABLED)
+            # Only follow new lines if the user has not scrolled back
+            if follow:
+                self.text.see(tk.END)
+
+    def make_entry(self, line):
+        header = TEST_CASE_HEADER.match(line)
+        if header and not TEST_CASE_FOOTER.match(line):
+            self.current_test_case = header.group(1)
+            if self.current_test_case not in self.test_cases:
+                self.test_cases.append(self.current_test_case)
+                self.test_case_combobox.config(values=[ALL_TEST_CASES] + self.test_cases)
+        entry = LogEntry(line, self.current_test_case, any(marker in line for marker in ERROR_MARKERS))
+        if TEST_CASE_FOOTER.match(line):
+            self.current_test_case = None
+        return entry
+
+    def matches(self, entry):
+        if self.mode_var.get() == ERRORS_ONLY and not entry.is_error:
+            return False
+        test_case = self.test_case_var.get()
+        if test_case != ALL_TEST_CASES and entry.test_case != test_case:
+            return False
+        search = self.search_var.get()
+        return not search or search in entry.line
+
+    def refresh(self):
+        # Rebuilds the widget from the in-memory buffer with the current filters
+        shown = [entry.line for entry in self.entries if self.matches(entry)]
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, "".join(line + "\n" for line in shown))
+        self.text.config(state=tk.DISABLED)
+        self.text.see(tk.END)
+        self.shown = len(shown)
+
+    def spill(self, entries):
+        try:
+            if self.spill_file is None:
+                os.makedirs(self.spill_folder, exist_ok=True)
+                self.spill_path = os.path.join(self.spill_folder, time.strftime("log_%Y%m%d_%H%M%S.txt", time.localtime()))
+                self.spill_file = open(self.spill_path, 'a', encoding='utf-8')
+                self.spill_label.config(text=f"Older lines in {self.spill_path}")
+            self.spill_file.write("".join(entry.line + "\n" for entry in entries))
+            self.spill_file.flush()
+        except OSError:
+            pass
+
+    def clear(self):
+        self.entries.clear()
+        self.test_cases = []
+        self.current_test_case = None
+        self.test_case_var.set(ALL_TEST_CASES)
+        self.test_case_combobox.config(values=[ALL_TEST_CASES])
+        self.close()
+        self.spill_label.config(text="")
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.config(state=tk.DISABLED)
+        self.shown = 0
+
+    def close(self):
+        if self.spill_file is not None:
+            self.spill_file.close()
+        self.spill_file = None
+        self.spill_path = None
@@ -6,10 +6,20 @@ import os
 import tkinter.filedialog as fd
 import shutil
 import time
-from fpdf import FPDF
-import csv
 import json
+import queue
+import sqlite3
 from test_suite_manager import TestSuiteManager
+from plan_cache import PlanCache
+from result_store import ResultStore
+from artifacts import ArtifactStore
+from log_view import LogView
+from launch_profiles import load_profiles
+from catalog import Catalog, TEST_CASES, TEST_SUITES, RESULT_FILTERS, ALL_RESULTS
+from run_history import RunHistory, SUITE_ORDERS, STORED_ORDER
+
+# Side panel rows fetched from the catalog at a time
+PROJECT_LIST_PAGE = 200
 
 class AutomatedTestingApp:
     def __init__(self, master):
@@ -31,6 +41,12 @@ class AutomatedTestingApp:
         os.makedirs(self.test_cases_folder, exist_ok=True)
         os.makedirs(self.test_suites_folder, exist_ok=True)
 
+        # Index of both folders, the side panel lists and searches it instead of the folders
+        self.catalog = Catalog(os.path.join(self.project_folder, "catalog.db"), {TEST_CASES: self.test_cases_folder, TEST_SUITES: self.test_suites_folder})
+
+        # Results of every run, kept across sessions to order suites
+        self.history = RunHistory(os.path.join(self.project_folder, "history.db"))
+
         # Styling with ttkbootstrap
         style = Style(theme='flatly')  # Use the Flatly theme
 
@@ -57,6 +73,8 @@ class AutomatedTestingApp:
         self.components_menu.add_command(label="Connect to Database", command=lambda: self.add_block("Database"))
         self.components_menu.add_command(label="Retrieve data", command=lambda: self.add_block("Retrieve data"))
         self.components_menu.add_command(label="Delay action", command=lambda: self.add_block("Delay:"))
+        self.components_menu.add_command(label="Wait until condition", command=lambda: self.add_block("Wait until"))
+        self.components_menu.add_command(label="Setup fixture (reuse steps above)", command=lambda: self.add_block("Setup fixture"))
 
         # Test Suites menu
         self.suites_menu = tk.Menu(self.menu_bar, tearoff=0)
@@ -66,6 +84,7 @@ class AutomatedTestingApp:
 
         # Help menu
         self.help_menu = tk.Menu(self.menu_bar, tearoff=0)
+        self.help_menu.add_command(label="Widget statistics", command=self.widget_stats)
         self.help_menu.add_command(label="About", command=self.about)
 
         # Add menus to menu bar
@@ -76,6 +95,9 @@ class AutomatedTestingApp:
 
         master.config(menu=self.menu_bar)
 
+        # Log lines and run status arrive from the test thread through this queue
+        self.ui_queue = queue.Queue()
+
         # Toolbar
         self.toolbar = tk.Frame(master, bd=1, relief=tk.RAISED)
         self.toolbar.pack(side=tk.TOP, fill=tk.X, padx=5, pady=5)
@@ -91,6 +113,50 @@ class AutomatedTestingApp:
         # Bind the event to the combobox
         self.webdriver_dropdown.bind("<<ComboboxSelected>>", self.on_combobox_select)
 
+        # Launch profiles from projects/Launch Profiles plus the built-in ones
+        self.launch_profiles_folder = os.path.join(self.project_folder, "Launch Profiles")
+        os.makedirs(self.launch_profiles_folder, exist_ok=True)
+        self.skipped_profiles = set()  # Reported once, the list is reloaded every time it opens
+        self.launch_profiles = load_profiles(self.launch_profiles_folder, self.log_skipped_profile)
+
+        self.profile_label = tk.Label(self.toolbar, text="Profile:")
+        self.profile_label.pack(side=tk.LEFT, padx=5)
+
+        self.profile_var = tk.StringVar(value="Default")
+        self.profile_dropdown = ttk.Combobox(self.toolbar, textvariable=self.profile_var, values=list(self.launch_profiles), state='readonly', width=16)
+        self.profile_dropdown.pack(side=tk.LEFT, padx=2)
+        self.profile_dropdown.bind("<<ComboboxSelected>>", self.on_profile_select)
+        # Profiles saved while the app is open show up the next time the list is opened
+        self.profile_dropdown.config(postcommand=self.reload_launch_profiles)
+
+        # Number of browser sessions used to run a suite in parallel
+        self.workers_label = tk.Label(self.toolbar, text="Workers:")
+        self.workers_label.pack(side=tk.LEFT, padx=5)
+
+        self.workers_var = tk.IntVar(value=1)
+        self.workers_spinbox = ttk.Spinbox(self.toolbar, from_=1, to=16, textvariable=self.workers_var, width=3, state='readonly')
+        self.workers_spinbox.pack(side=tk.LEFT, padx=2)
+
+        # Order suites by the run history, e.g. last run's failures first
+        self.order_label = tk.Label(self.toolbar, text="Order:")
+        self.order_label.pack(side=tk.LEFT, padx=5)
+
+        self.order_var = tk.StringVar(value=STORED_ORDER)
+        self.order_dropdown = ttk.Combobox(self.toolbar, textvariable=self.order_var, values=SUITE_ORDERS, state='readonly', width=13)
+        self.order_dropdown.pack(side=tk.LEFT, padx=2)
+        self.order_dropdown.bind("<<ComboboxSelected>>", self.on_order_select)
+
+        # Look up the elements of consecutive text and image verifications in one script, input and
+        # clicks always go through WebDriver
+        self.batch_var = tk.BooleanVar(value=False)
+        self.batch_checkbutton = ttk.Checkbutton(self.toolbar, text="Batch steps", variable=self.batch_var, command=self.on_batch_toggle)
+        self.batch_checkbutton.pack(side=tk.LEFT, padx=5)
+
+        # Reuse element handles until the page changes
+        self.cache_var = tk.BooleanVar(value=False)
+        self.cache_checkbutton = ttk.Checkbutton(self.toolbar, text="Cache elements", variable=self.cache_var, command=self.on_cache_toggle)
+        self.cache_checkbutton.pack(side=tk.LEFT, padx=5)
+
         # Add separator
         separator = tk.Canvas(self.toolbar, height=20, width=1, bd=0, highlightthickness=0, bg='black')
         separator.pack(side=tk.LEFT, padx=5, pady=2)
@@ -104,6 +170,13 @@ class AutomatedTestingApp:
         self.button_suite = ttk.Button(self.toolbar, text="Start Test Suite", command=self.run_suite)
         self.button_suite.pack(side=tk.LEFT, padx=2)
 
+        self.button_stop = ttk.Button(self.toolbar, text="Stop", command=self.stop_testing, state=tk.DISABLED)
+        self.button_stop.pack(side=tk.LEFT, padx=2)
+
+        # Live status of the current run (test case and step)
+        self.progress_label = tk.Label(self.toolbar, text="")
+        self.progress_label.pack(side=tk.LEFT, padx=10)
+
         # Create a PanedWindow for horizontal layout
         self.paned_window_horizontal = ttk.PanedWindow(master, orient=tk.HORIZONTAL)
         self.paned_window_horizontal.pack(fill=tk.BOTH, expand=True)
@@ -112,8 +185,31 @@ class AutomatedTestingApp:
         self.side_panel = tk.Frame(self.paned_window_horizontal, bg='lightgrey', width=200)
         self.label_project = tk.Label(self.side_panel, text="Project:", font=('Helvetica', 12))
         self.label_project.pack(pady=10)
-        self.project_listbox = tk.Listbox(self.side_panel)
-        self.project_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        # Search matches file names, block types and URLs, the filter uses the last result
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(self.side_panel, textvariable=self.search_var)
+        self.search_entry.pack(fill=tk.X, padx=5)
+        self.search_entry.bind("<KeyRelease>", self.on_search)
+        self.search_job = None
+        self.result_filter_var = tk.StringVar(value=ALL_RESULTS)
+        self.result_filter = ttk.Combobox(self.side_panel, textvariable=self.result_filter_var, values=RESULT_FILTERS, state="readonly")
+        self.result_filter.pack(fill=tk.X, padx=5, pady=(5, 0))
+        self.result_filter.bind("<<ComboboxSelected>>", self.on_search)
+
+        # Folder listings are filled a page at a time as the list is scrolled
+        self.listing_offset = 0
+        self.listing_total = 0
+        self.listing_job = None
+        self.listing_label = tk.Label(self.side_panel, text="", bg='lightgrey')
+        self.listing_label.pack(side=tk.BOTTOM, fill=tk.X, padx=5)
+        self.project_list_frame = tk.Frame(self.side_panel)
+        self.project_list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.project_scrollbar = ttk.Scrollbar(self.project_list_frame, orient=tk.VERTICAL)
+        self.project_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.project_listbox = tk.Listbox(self.project_list_frame, yscrollcommand=self.on_project_scroll)
+        self.project_listbox.pack(fill=tk.BOTH, expand=True)
+        self.project_scrollbar.config(command=self.project_listbox.yview)
         self.paned_window_horizontal.add(self.side_panel)
 
         # Load existing project files into the listbox
@@ -146,12 +242,22 @@ class AutomatedTestingApp:
         self.csv_button = ttk.Button(self.label_clear_frame, text="Export CSV", command=self.export_csv)
         self.csv_button.pack(side=tk.RIGHT, padx=5)
 
-        self.log_text = tk.Text(self.log_reports_panel, height=8, state=tk.DISABLED)
-        self.log_text.pack(padx=10, fill=tk.BOTH, expand=True)
+        # Bounded log, lines beyond the cap are spilled to projects/Logs
+        self.log_view = LogView(self.log_reports_panel, os.path.join(self.project_folder, "Logs"))
+        self.log_view.frame.pack(fill=tk.BOTH, expand=True)
         self.paned_window_vertical.add(self.log_reports_panel)
 
+        self.master.after(100, self.process_ui_queue)
+
+        # Every run appends its step records here, the exports read them back
+        self.result_store = ResultStore(os.path.join(self.project_folder, "Results"))
+
+        # Failed steps leave a screenshot and page source here
+        self.artifacts = ArtifactStore(os.path.join(self.project_folder, "Artifacts"), logger=self.log)
+
         # Integrate test case components into main panel
-        self.test_app = TestComposApp(master, self.main_panel, self.toolbar, self.log, self.mark_as_unsaved)
+        self.test_app = TestComposApp(master, self.main_panel, self.toolbar, self.log, self.mark_as_unsaved, self.report_progress, self.run_finished,
+                                      PlanCache(cache_dir=os.path.join(self.project_folder, "Plans")), self.result_store, self.artifacts, self.catalog, self.history)
 
         # Configure weight for resizable
         master.columnconfigure(0, weight=1)
@@ -169,24 +275,62 @@ class AutomatedTestingApp:
 
     def on_combobox_select(self, event):
         event.widget.selection_clear()
+        # Warm up a session for the picked browser so the next run starts immediately
+        self.test_app.session_pool.prelaunch(self.webdriver_var.get(), self.test_app.launch_profile)
+
+    def reload_launch_profiles(self):
+        self.launch_profiles = load_profiles(self.launch_profiles_folder, self.log_skipped_profile)
+        self.profile_dropdown.config(values=list(self.launch_profiles))
+
+    def log_skipped_profile(self, message):
+        if message not in self.skipped_profiles:
+            self.skipped_profiles.add(message)
+            self.log(message)
+
+    def on_profile_select(self, event):
+        event.widget.selection_clear()
+        self.test_app.set_launch_profile(self.launch_profiles.get(self.profile_var.get()))
+        self.test_app.session_pool.prelaunch(self.webdriver_var.get(), self.test_app.launch_profile)
+
+    def on_order_select(self, event):
+        event.widget.selection_clear()
+        self.test_app.set_suite_order(self.order_var.get())
+
+    def on_batch_toggle(self):
+        self.test_app.set_batch_steps(self.batch_var.get())
+
+    def on_cache_toggle(self):
+        self.test_app.set_cache_elements(self.cache_var.get())
 
     def start_testing(self):
         webdriver_choice = self.webdriver_var.get()
         self.test_app.start_testing(webdriver_choice)
-        self.log_text.config(state=tk.NORMAL)
-        self.log_text.insert(tk.END,"\n\n")
-        self.log_text.see(tk.END)
-        self.log_text.config(state=tk.DISABLED)
+        self.set_running(self.test_app.is_running())
+
+    def stop_testing(self):
+        self.test_app.stop_testing()
+
+    def set_running(self, running):
+        self.button_start.config(state=tk.DISABLED if running else tk.NORMAL)
+        self.button_suite.config(state=tk.DISABLED if running else tk.NORMAL)
+        self.button_stop.config(state=tk.NORMAL if running else tk.DISABLED)
 
     def add_block(self, block_type):
-        self.test_app.create_draggable_block(50, 50, block_type)
+        self.test_app.add_block(block_type)
         self.mark_as_unsaved()
 
     def about(self):
         about_message = "Automated Testing Application\nVersion 1.0\nDeveloped by Shahirah Binti Abdul Aziz"
         messagebox.showinfo("About", about_message)
 
+    def widget_stats(self):
+        stats = self.test_app.log_widget_stats()
+        messagebox.showinfo("Widget statistics", f"Live widgets: {stats['live']}\nOn canvas: {stats['in_use']} ({stats['blocks']} block(s))\nPooled for reuse: {stats['pooled']}")
+
     def load_existing_projects(self):
+        self.cancel_listing_job()
+        self.listing_offset = self.listing_total = 0
+        self.listing_label.config(text="")
         self.project_listbox.delete(0, tk.END)
         self.project_listbox.insert(tk.END, "Test Cases")
         self.project_listbox.insert(tk.END, "Test Suites")
@@ -222,6 +366,7 @@ class AutomatedTestingApp:
             self.unsaved_changes = False
 
     def update_project_list(self, file_name):
+        self.update_catalog(TEST_CASES)
         if file_name not in self.project_listbox.get(0, tk.END):
             self.project_listbox.insert(tk.END, file_name)
 
@@ -247,10 +392,56 @@ class AutomatedTestingApp:
                 self.load_test_case_or_suite(folder_name)
 
     def display_files(self, folder_path, folder_name):
+        # Only files changed since the last visit are read again
+        self.update_catalog(folder_name)
+        self.fill_project_list(folder_name)
+
+    def update_catalog(self, folder_name):
+        try:
+            self.catalog.update(folder_name)
+        except (OSError, sqlite3.Error) as e:
+            self.log(f"Failed to update the catalog: {e}")
+
+    def cancel_listing_job(self):
+        if self.listing_job is not None:
+            self.master.after_cancel(self.listing_job)
+            self.listing_job = None
+
+    def fill_project_list(self, folder_name):
+        self.cancel_listing_job()
         self.project_listbox.delete(0, tk.END)  # Clear all items
         self.project_listbox.insert(tk.END, folder_name)  # Insert the folder name
-        for file in os.listdir(folder_path):
-            self.project_listbox.insert(tk.END, file)
+        self.listing_offset = 0
+        self.listing_total = self.catalog.count(folder_name, self.search_var.get(), self.result_filter_var.get())
+        self.load_more_files(folder_name)
+
+    def load_more_files(self, folder_name):
+        self.listing_job = None
+        names = self.catalog.names(folder_name, self.search_var.get(), self.result_filter_var.get(), self.listing_offset, PROJECT_LIST_PAGE)
+        if names:
+            self.project_listbox.insert(tk.END, *names)
+        self.listing_offset += len(names)
+        self.listing_label.config(text=f"{self.listing_total} file(s)" + (f", {self.listing_offset} loaded" if self.listing_offset < self.listing_total else ""))
+
+    def on_project_scroll(self, first, last):
+        self.project_scrollbar.set(first, last)
+        # The next page is loaded once the end of the list comes into view
+        if self.current_folder and self.listing_job is None and float(last) > 0.9 and self.listing_offset < self.listing_total:
+            self.listing_job = self.master.after_idle(self.load_more_files, self.current_folder)
+
+    def on_search(self, event=None):
+        # Typing restarts a short timer, the query runs once the user pauses
+        if self.search_job is not None:
+            self.master.after_cancel(self.search_job)
+        self.search_job = self.master.after(200, self.run_search)
+
+    def run_search(self):
+        self.search_job = None
+        if self.current_folder is None:
+            # Searching from the top level searches the test cases
+            self.current_folder = TEST_CASES
+            self.update_catalog(TEST_CASES)
+        self.fill_project_list(self.current_folder)
 
     def load_test_case_or_suite(self, file_name):
         if self.current_folder == "Test Cases":
@@ -267,22 +458,53 @@ class AutomatedTestingApp:
     def display_test_suite(self, file_path):
         with open(file_path, 'r') as file:
             content = json.load(file)
-            content_str = "\n".join(content)
-            messagebox.showinfo("Test Suite Content", content_str)
+        lines = []
+        for test_case in content:
+            details = self.catalog.details(TEST_CASES, os.path.basename(test_case))
+            if details is None:
+                lines.append(test_case)
+            else:
+                lines.append(f"{os.path.basename(test_case)}: {details['steps']} step(s), {details['last_result'] or 'not run'}")
+        messagebox.showinfo("Test Suite Content", "\n".join(lines))
 
     def log(self, message):
-        self.log_text.config(state=tk.NORMAL)
-        self.log_text.insert(tk.END, message + "\n")
-        self.log_text.see(tk.END)
-        self.log_text.config(state=tk.DISABLED)
+        # Safe to call from any thread, the text widget is only touched in process_ui_queue
+        self.ui_queue.put(("log", message))
+
+    def report_progress(self, status):
+        self.ui_queue.put(("progress", status))
+
+    def run_finished(self):
+        self.ui_queue.put(("finished", None))
+
+    def process_ui_queue(self):
+        lines = []
+        try:
+            while True:
+                kind, payload = self.ui_queue.get_nowait()
+                if kind == "log":
+                    lines.extend(payload.split("\n"))
+                elif kind == "progress":
+                    self.progress_label.config(text=payload)
+                elif kind == "finished":
+                    lines.append("")
+                    self.progress_label.config(text="")
+                    self.set_running(False)
+                    self.test_app.run_finished()
+        except queue.Empty:
+            pass
+
+        if lines:
+            self.log_view.add_lines(lines)
+
+        self.master.after(100, self.process_ui_queue)
 
     def clear_log(self):
-        self.log_text.config(state=tk.NORMAL)
-        self.log_text.delete(1.0, tk.END)
-        self.log_text.config(state=tk.DISABLED)
+        self.log_view.clear()
+        # Exports cover what ran since the last clear
+        self.result_store.rotate()
 
     def print_log(self):
-        log_content = self.log_text.get(1.0, tk.END).strip()
         current_date = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
         project_file_name = None
 
@@ -292,39 +514,30 @@ class AutomatedTestingApp:
 
         # Ask user where to save the output
         file_path = fd.asksaveasfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt"), ("PDF files", "*.pdf")])
+        header_lines = [f"Test Results on {current_date}"]
+        if project_file_name:
+            header_lines.append(f"Project File: {project_file_name}")
         if file_path:
             if file_path.endswith('.txt'):
-                with open(file_path, 'w') as file:
-                    file.write(f"Test Results on {current_date}\n")
-                    if project_file_name:
-                        file.write(f"Project File: {project_file_name}\n\n")
-                    file.write(log_content)
+                self.result_store.export_text(file_path, header_lines)
             elif file_path.endswith('.pdf'):
-                pdf = FPDF()
-                pdf.add_page()
-                pdf.set_font("Arial", size=12)
-                pdf.cell(200, 10, txt=f"Test Results on {current_date}", ln=True, align='C')
-                if project_file_name:
-                    pdf.cell(200, 10, txt=f"Project File: {project_file_name}", ln=True, align='C')
-                pdf.ln(10)  # Add a line break
-                pdf.multi_cell(0, 10, log_content)
-                pdf.output(file_path)
+                self.result_store.export_pdf(file_path, header_lines)
 
     def export_csv(self):
-        log_content = self.log_text.get(1.0, tk.END).strip().split('\n')
-        log_entries = [(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()), entry) for entry in log_content]
-
         file_path = fd.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
         if file_path:
-            with open(file_path, 'w', newline='') as csvfile:
-                log_writer = csv.writer(csvfile)
-                log_writer.writerow(['Timestamp', 'Log Entry'])
-                log_writer.writerows(log_entries)
+            self.result_store.export_csv(file_path)
 
     def on_closing(self):
         if self.unsaved_changes:
             if messagebox.askyesno("Unsaved Changes", "You have unsaved changes. Do you want to save before exiting?"):
                 self.save_project()
+        self.test_app.shutdown()
+        self.result_store.close()
+        self.artifacts.close()
+        self.catalog.close()
+        self.history.close()
+        self.log_view.close()
         self.master.destroy()
 
     def mark_as_unsaved(self):
@@ -334,13 +547,15 @@ class AutomatedTestingApp:
         self.on_closing()
 
     def new_suite(self):
-        self.test_suite_manager.new_suite(self.master, self.webdriver_var, self.test_app)
+        self.test_suite_manager.new_suite(self.master, self.webdriver_var, self.test_app, self.workers_var)
+        self.set_running(self.test_app.is_running())
 
     def edit_suite(self):
         self.test_suite_manager.edit_suite(self.master)
 
     def run_suite(self):
-        self.test_suite_manager.run_suite(self.test_app, self.webdriver_var, self.master)
+        self.test_suite_manager.run_suite(self.test_app, self.webdriver_var, self.master, self.workers_var)
+        self.set_running(self.test_app.is_running())
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from test_runner import Step, compile_test_case
+
+# Bump when compile_step changes what it stores, older files in the disk cache are then dropped
+PLAN_VERSION = 2
+
+# Temporary files older than this are left over from a crash and removed when pruning
+STALE_TEMPORARY_SECONDS = 3600
+
+class TestPlan:
+    # data is the saved block list for the canvas, steps the validated plan the runner executes.
+    # A file that does not validate still opens on the canvas, error says why it cannot run.
+    def __init__(self, digest, data, steps=None, error=None):
+        self.digest = digest
+        self.data = data
+        self.steps = steps
+        self.error = error
+
+class PlanCache:
+    # Compiled test cases kept in LRU order by content hash. A file is only re-read when its
+    # mtime or size changes and only recompiled when its content does, so suites that share
+    # test cases and repeat runs parse and validate each file once.
+    def __init__(self, max_entries=256, cache_dir=None, max_disk_entries=2048):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir  # Optional folder for plans that survive a restart
+        self.max_disk_entries = max_disk_entries  # Plan files kept on disk, least recently used go first
+        self.writes = 0
+        self.lock = threading.Lock()
+        self.plans = OrderedDict()
+        self.files = {}
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.prune()
+
+    def load(self, path):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self.lock:
+            known = self.files.get(path)
+            if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+                plan = self.lookup(known[2])
+                if plan is not None:
+                    return plan
+
+        with open(path, 'rb') as file:
+            content = file.read()
+        digest = hashlib.sha256(content).hexdigest()
+        with self.lock:
+            self.files[path] = (stat.st_mtime_ns, stat.st_size, digest)
+            plan = self.lookup(digest)
+            if plan is not None:
+                return plan
+            self.misses += 1
+
+        plan = self.read_plan(digest)
+        if plan is None:
+            data = json.loads(content)
+            try:
+                plan = TestPlan(digest, data, compile_test_case(data))
+            except (KeyError, TypeError, ValueError) as e:
+                plan = TestPlan(digest, data, error=str(e))
+            self.write_plan(plan)
+
+        with self.lock:
+            self.plans[digest] = plan
+            self.plans.move_to_end(digest)
+            while len(self.plans) > self.max_entries:
+                self.plans.popitem(last=False)
+        return plan
+
+    def steps(self, path):
+        plan = self.load(path)
+        if plan.error:
+            raise ValueError(plan.error)
+        return plan.steps
+
+    def lookup(self, digest):
+        # Caller holds the lock
+        plan = self.plans.get(digest)
+        if plan is not None:
+            self.plans.move_to_end(digest)
+            self.hits += 1
+        return plan
+
+    def clear(self):
+        with self.lock:
+            self.plans.clear()
+            self.files.clear()
+
+    def plan_file(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def read_plan(self, digest):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self.plan_file(digest), 'r') as file:
+                stored = json.load(file)
+            if stored.get("version") != PLAN_VERSION:
+                # Written by an older compile_step, it will never be used again
+                self.remove(self.plan_file(digest))
+                return None
+            steps = None if stored["steps"] is None else [Step.from_dict(step) for step in stored["steps"]]
+            # The mtime marks when the plan was last used, prune() goes by it
+            os.utime(self.plan_file(digest))
+            return TestPlan(digest, stored["data"], steps, stored.get("error"))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def write_plan(self, plan):
+        if not self.cache_dir:
+            return
+        stored = {
+            "version": PLAN_VERSION,
+            "data": plan.data,
+            "steps": None if plan.steps is None else [step.to_dict() for step in plan.steps],
+            "error": plan.error,
+        }
+        # Written to a temporary name first so a half-written plan is never read back
+        temporary = f"{self.plan_file(plan.digest)}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporary, 'w') as file:
+                json.dump(stored, file)
+            os.replace(temporary, self.plan_file(plan.digest))
+        except OSError:
+            self.remove(temporary)
+            return
+        with self.lock:
+            self.writes += 1
+            due = self.writes >= max(1, self.max_disk_entries // 8)
+            if due:
+                self.writes = 0
+        if due:
+            self.prune()
+
+    def prune(self):
+        # Plans are named by content hash, so an edited or deleted test case leaves its old plan
+        # behind. Keeps the max_disk_entries most recently used plans and drops crash leftovers.
+        plans = []
+        now = time.time()
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    try:
+                        mtime = entry.stat().st_mtime
+                    except OSError:
+                        continue
+                    if entry.name.endswith(".tmp"):
+                        if now - mtime > STALE_TEMPORARY_SECONDS:
+                            self.remove(entry.path)
+                    elif entry.name.endswith(".json"):
+                        plans.append((mtime, entry.path))
+        except OSError:
+            return
+        plans.sort()
+        for _, path in plans[:max(0, len(plans) - self.max_disk_entries)]:
+            self.remove(path)
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,130 @@
+import csv
+import json
+import os
+import threading
+import time
+
+CSV_COLUMNS = ["Test case", "Step", "Block type", "Locator", "Outcome", "Start", "End", "Duration (s)", "Error", "Log"]
+
+def format_timestamp(seconds):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(seconds)) + f".{int(seconds * 1000) % 1000:03d}"
+
+def read_records(path):
+    # Streams records back one line at a time, the file is never loaded whole
+    if not path or not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def report_lines(record):
+    if record["record"] == "test_case":
+        status = "PASSED" if record["passed"] else "FAILED"
+        yield f"=== {record['test_case']}: {status} in {record['duration']:.2f}s ==="
+        yield ""
+        return
+    locator = f" [{record['locator']}]" if record["locator"] else ""
+    yield f"{record['start']} {record['test_case']} step {record['index']} {record['block_type']}{locator} - {record['outcome']}"
+    for line in record["log"]:
+        yield f"    {line}"
+    if record["error"]:
+        yield f"    Error: {record['error']}"
+
+class ResultStore:
+    # Append-only JSON lines under projects/Results, one record per finished step and one per
+    # finished test case, written as the run goes. Exports read the file back as a stream.
+    def __init__(self, folder):
+        self.folder = folder
+        self.lock = threading.Lock()
+        self.path = None
+        self.file = None
+        os.makedirs(folder, exist_ok=True)
+
+    def append(self, record):
+        line = json.dumps(record) + "\n"
+        with self.lock:
+            if self.file is None:
+                # The file is only created once there is something to put in it
+                self.path = os.path.join(self.folder, time.strftime("results_%Y%m%d_%H%M%S.jsonl", time.localtime()))
+                self.file = open(self.path, 'a', encoding='utf-8')
+            self.file.write(line)
+            self.file.flush()
+
+    def add_step(self, test_case, index, block_type, locator, outcome, started, finished, error, log):
+        self.append({
+            "record": "step",
+            "test_case": test_case,
+            "index": index,
+            "block_type": block_type,
+            "locator": locator,
+            "outcome": outcome,
+            "start": format_timestamp(started),
+            "end": format_timestamp(finished),
+            "duration": finished - started,
+            "error": error,
+            "log": log,
+        })
+
+    def add_test_case(self, test_case, passed, started, finished):
+        self.append({
+            "record": "test_case",
+            "test_case": test_case,
+            "passed": passed,
+            "start": format_timestamp(started),
+            "end": format_timestamp(finished),
+            "duration": finished - started,
+        })
+
+    def records(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+            path = self.path
+        return read_records(path)
+
+    def rotate(self):
+        # Later records go to a new file, the old one stays on disk
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+            self.file = None
+            self.path = None
+
+    def close(self):
+        self.rotate()
+
+    def export_csv(self, file_path):
+        with open(file_path, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(CSV_COLUMNS)
+            for record in self.records():
+                if record["record"] != "step":
+                    continue
+                writer.writerow([record["test_case"], record["index"], record["block_type"], record["locator"], record["outcome"],
+                                 record["start"], record["end"], f"{record['duration']:.3f}", record["error"] or "", "\n".join(record["log"])])
+
+    def export_text(self, file_path, header_lines):
+        with open(file_path, 'w') as file:
+            for line in header_lines:
+                file.write(line + "\n")
+            file.write("\n")
+            for record in self.records():
+                for line in report_lines(record):
+                    file.write(line + "\n")
+
+    def export_pdf(self, file_path, header_lines):
+        # Only PDF exports need fpdf
+        from fpdf import FPDF
+        pdf = FPDF()
+        pdf.add_page()
+        pdf.set_font("Arial", size=12)
+        for line in header_lines:
+            pdf.cell(200, 10, txt=line, ln=True, align='C')
+        pdf.ln(10)  # Add a line break
+        pdf.set_font("Arial", size=10)
+        for record in self.records():
+            for line in report_lines(record):
+                pdf.multi_cell(0, 6, line)
+        pdf.output(file_path)
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+STORED_ORDER = "Stored order"
+FAILED_FIRST = "Failed first"
+CHANGED_FIRST = "Changed first"
+FAILURES_ONLY = "Failures only"
+SUITE_ORDERS = [STORED_ORDER, FAILED_FIRST, CHANGED_FIRST, FAILURES_ONLY]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    test_case TEXT NOT NULL,
+    finished REAL NOT NULL,
+    passed INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    mtime REAL,
+    digest TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_by_test_case ON runs (test_case, finished);
+"""
+
+def history_key(test_case):
+    return os.path.normcase(os.path.abspath(test_case))
+
+def file_digest(path):
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+class RunHistory:
+    # Outcome and duration of every test case run at projects/history.db, kept across sessions.
+    # Each run also stores the file's mtime and hash so a later suite can tell which test cases
+    # were edited since they last ran.
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+    def record(self, test_case, passed, duration):
+        try:
+            mtime, digest = os.path.getmtime(test_case), file_digest(test_case)
+        except OSError:
+            mtime = digest = None
+        with self.lock:
+            self.connection.execute("INSERT INTO runs (test_case, finished, passed, duration, mtime, digest) VALUES (?, ?, ?, ?, ?, ?)",
+                                    (history_key(test_case), time.time(), int(bool(passed)), duration, mtime, digest))
+            self.connection.commit()
+
+    def last_runs(self, test_cases):
+        # {key: (passed, duration, mtime, digest)} of the latest run of each test case that has one
+        keys = list(set(history_key(test_case) for test_case in test_cases))
+        last = {}
+        with self.lock:
+            # Chunked to stay under SQLite's bound parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self.connection.execute(f"""
+                    SELECT test_case, passed, duration, mtime, digest FROM runs AS run
+                    WHERE test_case IN ({', '.join('?' * len(chunk))})
+                    AND finished = (SELECT MAX(finished) FROM runs WHERE test_case = run.test_case)
+                """, chunk).fetchall()
+                for key, passed, duration, mtime, digest in rows:
+                    last[key] = (bool(passed), duration, mtime, digest)
+        return last
+
+    def changed(self, test_case, last_run):
+        # The hash is only computed when the mtime moved, a touched but unchanged file is not changed
+        if last_run is None:
+            return True
+        _, _, mtime, digest = last_run
+        try:
+            if os.path.getmtime(test_case) == mtime:
+                return False
+            return file_digest(test_case) != digest
+        except OSError:
+            return True
+
+    def order(self, test_cases, mode):
+        # Returns the test cases to run, in the order to run them. Sorting is stable so ties keep suite order.
+        if mode == STORED_ORDER:
+            return list(test_cases)
+        last = self.last_runs(test_cases)
+        runs = [last.get(history_key(test_case)) for test_case in test_cases]
+        if mode == FAILED_FIRST:
+            # Failed last time, then never run, then passed
+            rank = [0 if run is not None and not run[0] else 1 if run is None else 2 for run in runs]
+            return [test_case for _, _, test_case in sorted(zip(rank, range(len(test_cases)), test_cases))]
+        if mode == CHANGED_FIRST:
+            # Edited since their last run (or never run), most recently edited first
+            changed, unchanged = [], []
+            for test_case, run in zip(test_cases, runs):
+                if self.changed(test_case, run):
+                    try:
+                        mtime = os.path.getmtime(test_case)
+                    except OSError:
+                        mtime = 0
+                    changed.append((-mtime, len(changed), test_case))
+                else:
+                    unchanged.append(test_case)
+            return [test_case for _, _, test_case in sorted(changed)] + unchanged
+        if mode == FAILURES_ONLY:
+            return [test_case for test_case, run in zip(test_cases, runs) if run is not None and not run[0]]
+        raise ValueError(f"Unsupported suite order: {mode}")
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,81 @@
+import json
+import os
+
+# Time spent in a step is split into these phases, "action" is whatever is left over
+PHASES = ["locate", "action", "db_connect", "db_query"]
+
+def profile_path(path):
+    # login.json -> login.profile.json, saved next to the test case or suite
+    return os.path.splitext(path)[0] + ".profile.json"
+
+def is_profile_file(file_name):
+    return file_name.endswith(".profile.json")
+
+class RunProfile:
+    def __init__(self, name):
+        self.name = name
+        self.steps = []
+        self.test_cases = []
+        self.counters = {}
+
+    def start_step(self, test_case, index, block_type):
+        step = {"test_case": test_case, "index": index, "block_type": block_type, "duration": 0.0}
+        for phase in PHASES:
+            step[phase] = 0.0
+        self.steps.append(step)
+        return step
+
+    def finish_step(self, step, duration):
+        step["duration"] = duration
+        step["action"] = max(0.0, duration - step["locate"] - step["db_connect"] - step["db_query"])
+
+    def count(self, counter, amount=1):
+        # Run-wide tallies such as element cache hits and misses
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def add_test_case(self, test_case, duration, passed):
+        self.test_cases.append({"test_case": test_case, "duration": duration, "passed": passed})
+
+    def merge(self, other):
+        self.steps.extend(other.steps)
+        self.test_cases.extend(other.test_cases)
+        for counter, amount in other.counters.items():
+            self.count(counter, amount)
+
+    def summary(self, top=10):
+        block_types = {}
+        for step in self.steps:
+            totals = block_types.setdefault(step["block_type"], {"count": 0, "duration": 0.0})
+            totals["count"] += 1
+            totals["duration"] += step["duration"]
+            for phase in PHASES:
+                totals[phase] = totals.get(phase, 0.0) + step[phase]
+
+        return {
+            "name": self.name,
+            "total": sum(test_case["duration"] for test_case in self.test_cases),
+            "slowest_steps": sorted(self.steps, key=lambda step: step["duration"], reverse=True)[:top],
+            "block_types": dict(sorted(block_types.items(), key=lambda item: item[1]["duration"], reverse=True)),
+            "test_cases": sorted(self.test_cases, key=lambda test_case: test_case["duration"], reverse=True),
+            "counters": dict(self.counters),
+        }
+
+    def save(self, path):
+        data = self.summary()
+        data["steps"] = self.steps
+        with open(path, 'w') as file:
+            json.dump(data, file, indent=2)
+
+    def summary_lines(self, top=5):
+        summary = self.summary(top)
+        lines = [f"Profile for {self.name}: {summary['total']:.3f}s total"]
+        for step in summary["slowest_steps"]:
+            lines.append(f"  Slow step: {step['test_case']} #{step['index']} {step['block_type']} {step['duration']:.3f}s (locate {step['locate']:.3f}s, action {step['action']:.3f}s, db {step['db_connect'] + step['db_query']:.3f}s)")
+        for block_type, totals in summary["block_types"].items():
+            lines.append(f"  Total for '{block_type}': {totals['count']} step(s), {totals['duration']:.3f}s")
+        if "element_cache_hits" in self.counters or "element_cache_misses" in self.counters:
+            lines.append(f"  Element cache: {self.counters.get('element_cache_hits', 0)} hit(s), {self.counters.get('element_cache_misses', 0)} miss(es), {self.counters.get('element_cache_stale', 0)} stale")
+        if len(summary["test_cases"]) > 1:
+            for test_case in summary["test_cases"]:
+                lines.append(f"  Test case {test_case['test_case']}: {test_case['duration']:.3f}s")
+        return lines
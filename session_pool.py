@@ -0,0 +1,148 @@
+import threading
+import time
+from test_runner import create_driver
+from fixtures import FixtureStore
+
+class SessionPool:
+    def __init__(self, logger, max_uses=20, max_idle=4, headless=False):
+        self.logger = logger
+        self.headless = headless
+        self.max_uses = max_uses  # A session is quit and replaced after this many runs
+        self.max_idle = max_idle  # Warm sessions kept per browser type and launch profile
+        self.lock = threading.Lock()
+        self.idle = {}
+        self.in_use = {}
+        self.uses = {}
+        self.launching = {}
+        self.closed = False  # Set by quit_all, sessions that turn up afterwards are quit
+        # Setup fixture snapshots belong to a session and go when it is quit
+        self.fixtures = FixtureStore()
+
+    def pool_key(self, webdriver_choice, profile):
+        return (webdriver_choice, profile.key() if profile is not None else None)
+
+    def describe(self, webdriver_choice, profile):
+        if profile is None or profile.name == "Default":
+            return webdriver_choice
+        return f"{webdriver_choice} ({profile.name})"
+
+    def acquire(self, webdriver_choice, profile=None):
+        # Wait for a pre-launch of the same browser instead of starting a second one
+        key = self.pool_key(webdriver_choice, profile)
+        launcher = self.launching.get(key)
+        if launcher is not None and launcher is not threading.current_thread():
+            launcher.join()
+
+        with self.lock:
+            sessions = self.idle.get(key, [])
+            driver = sessions.pop() if sessions else None
+
+        if driver is None:
+            driver = self.launch(webdriver_choice, profile)
+        else:
+            self.log(f"Reusing warm {self.describe(webdriver_choice, profile)} session.")
+
+        with self.lock:
+            self.in_use[driver] = (webdriver_choice, profile)
+            self.uses[driver] = self.uses.get(driver, 0) + 1
+        return driver
+
+    def release(self, driver, failed=False):
+        with self.lock:
+            entry = self.in_use.pop(driver, None)
+            uses = self.uses.get(driver, 0)
+        if entry is None:
+            return
+        webdriver_choice, profile = entry
+        description = self.describe(webdriver_choice, profile)
+
+        if failed or uses >= self.max_uses:
+            reason = "after its browser stopped responding" if failed else f"after {uses} runs"
+            self.log(f"Recycling {description} session {reason}.")
+            self.quit(driver)
+            return
+
+        try:
+            self.reset(driver)
+        except Exception as e:
+            self.log(f"Recycling {description} session, reset failed: {e}")
+            self.quit(driver)
+            return
+
+        with self.lock:
+            sessions = self.idle.setdefault(self.pool_key(webdriver_choice, profile), [])
+            if not self.closed and len(sessions) < self.max_idle:
+                sessions.append(driver)
+                return
+        self.quit(driver)
+
+    def reset(self, driver):
+        # Storage can only be cleared for the origin that is currently loaded, about:blank and
+        # data: pages throw a SecurityError that says nothing about the health of the session
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            pass
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def prelaunch(self, webdriver_choice, profile=None):
+        key = self.pool_key(webdriver_choice, profile)
+        with self.lock:
+            if self.closed or self.idle.get(key):
+                return
+            launcher = self.launching.get(key)
+            if launcher is not None and launcher.is_alive():
+                return
+            launcher = threading.Thread(target=self.prelaunch_worker, args=(webdriver_choice, profile), daemon=True)
+            self.launching[key] = launcher
+        launcher.start()
+
+    def prelaunch_worker(self, webdriver_choice, profile):
+        try:
+            driver = self.launch(webdriver_choice, profile)
+        except Exception as e:
+            self.log(f"Failed to pre-launch {self.describe(webdriver_choice, profile)} session: {e}")
+            return
+        with self.lock:
+            # A session still starting when the pool was closed would otherwise never be quit
+            if not self.closed:
+                self.idle.setdefault(self.pool_key(webdriver_choice, profile), []).append(driver)
+                return
+        self.quit(driver)
+
+    def launch(self, webdriver_choice, profile=None):
+        started = time.perf_counter()
+        driver = create_driver(webdriver_choice, self.headless, profile)
+        self.log(f"Started {self.describe(webdriver_choice, profile)} session in {time.perf_counter() - started:.2f}s.")
+        return driver
+
+    def is_alive(self, driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def quit(self, driver):
+        with self.lock:
+            self.uses.pop(driver, None)
+        self.fixtures.forget(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def quit_all(self):
+        with self.lock:
+            self.closed = True
+            drivers = [driver for sessions in self.idle.values() for driver in sessions]
+            drivers.extend(self.in_use)
+            self.idle.clear()
+            self.in_use.clear()
+        for driver in drivers:
+            self.quit(driver)
+
+    def log(self, message):
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+        self.logger(f"[{timestamp}] {message}")
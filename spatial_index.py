@@ -0,0 +1,79 @@
+import bisect
+
+class BlockIndex:
+    # Block rectangles kept sorted by top and by bottom edge so hit-testing, snapping
+    # and execution order are binary searches instead of scans over every block.
+    # Keys are canvas rectangle ids, which increase with creation order and break ties.
+    def __init__(self):
+        self.tops = []
+        self.bottoms = []
+        self.bounds = {}
+        self.max_height = 0
+
+    def __len__(self):
+        return len(self.bounds)
+
+    def insert(self, key, bounds):
+        x1, y1, x2, y2 = bounds
+        self.bounds[key] = (x1, y1, x2, y2)
+        bisect.insort(self.tops, (y1, key))
+        bisect.insort(self.bottoms, (y2, key))
+        self.max_height = max(self.max_height, y2 - y1)
+
+    def remove(self, key):
+        bounds = self.bounds.pop(key, None)
+        if bounds is None:
+            return
+        self.tops.pop(bisect.bisect_left(self.tops, (bounds[1], key)))
+        self.bottoms.pop(bisect.bisect_left(self.bottoms, (bounds[3], key)))
+
+    def move(self, key, bounds):
+        self.remove(key)
+        self.insert(key, bounds)
+
+    def clear(self):
+        self.tops.clear()
+        self.bottoms.clear()
+        self.bounds.clear()
+        self.max_height = 0
+
+    def hit_test(self, x, y):
+        # Only blocks whose top lies within one block height above y can contain the point;
+        # the lowest one wins, as it is drawn on top when blocks are stacked
+        start = bisect.bisect_left(self.tops, (y - self.max_height, -1))
+        end = bisect.bisect_right(self.tops, (y, float('inf')))
+        for index in range(end - 1, start - 1, -1):
+            key = self.tops[index][1]
+            x1, y1, x2, y2 = self.bounds[key]
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                return key
+        return None
+
+    def nearest_bottom(self, y, max_distance, exclude=None):
+        # Block whose bottom edge is closest to y and less than max_distance away
+        start = bisect.bisect_right(self.bottoms, (y - max_distance, float('inf')))
+        end = bisect.bisect_left(self.bottoms, (y + max_distance, -1))
+        closest_key = None
+        closest_distance = max_distance
+        for bottom, key in self.bottoms[start:end]:
+            if key == exclude:
+                continue
+            distance = abs(y - bottom)
+            if distance < closest_distance:
+                closest_distance = distance
+                closest_key = key
+        return closest_key
+
+    def bottom(self):
+        # Lowest block edge, used for the canvas scroll region
+        return self.bottoms[-1][0] if self.bottoms else 0
+
+    def in_range(self, top, bottom):
+        # Keys of blocks overlapping the vertical band [top, bottom]
+        start = bisect.bisect_left(self.tops, (top - self.max_height, -1))
+        end = bisect.bisect_right(self.tops, (bottom, float('inf')))
+        return [key for y1, key in self.tops[start:end] if self.bounds[key][3] >= top]
+
+    def ordered(self):
+        # Keys from top to bottom, the order steps run in
+        return [key for _, key in self.tops]
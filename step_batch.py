@@ -0,0 +1,68 @@
+# Batched execution: the elements of consecutive text and image verifications are looked up by
+# one execute_script call instead of a find_element per step, image sources are read by the same
+# script. Only reads are batched. Input and clicks go through WebDriver, which sends real key
+# events and checks that the element is visible and enabled, a script setting values would skip
+# all of that. Text is still read with WebDriver's element text: innerText differs from it for
+# hidden and CSS-transformed text, and a step must give the same result batched or not. Link text
+# locators match on that same rendered text, so steps using them are not batched.
+
+# WebDriver calls a batched step no longer makes
+ROUND_TRIPS = {"text": 1, "src": 2}
+
+BATCH_SCRIPT = """
+var operations = arguments[0], results = [];
+function locate(by, value) {
+    switch (by) {
+        case "id": return document.getElementById(value);
+        case "name": return document.getElementsByName(value)[0] || null;
+        case "class name": return document.getElementsByClassName(value)[0] || null;
+        case "css selector": return document.querySelector(value);
+        case "tag name": return document.getElementsByTagName(value)[0] || null;
+        case "xpath": return document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+    return null;
+}
+for (var i = 0; i < operations.length; i++) {
+    var operation = operations[i], element;
+    try {
+        element = locate(operation.by, operation.value);
+    } catch (e) {
+        results.push({error: String(e)});
+        break;
+    }
+    if (!element) {
+        results.push({error: "no such element: Unable to locate element by " + operation.by + " '" + operation.value + "'"});
+        break;
+    }
+    if (operation.kind === "text") {
+        // Returned as an element reference, the text is read through WebDriver
+        results.push({element: element});
+    } else if (operation.kind === "src") {
+        // Same as WebDriver's get_attribute, which prefers the resolved property
+        results.push({value: element.src !== undefined ? element.src : element.getAttribute("src")});
+    }
+}
+return results;
+"""
+
+def batch_operation(step):
+    # The script operation for a step, or None if the step has to run on its own
+    if not step.by or step.by in ["link text", "partial link text"]:
+        return None
+    if step.block_type == "Static content":
+        content_type, _, element_identifier, _ = step.values
+        if content_type == "Text":
+            return {"kind": "text", "by": step.by, "value": element_identifier}
+        if content_type in ["Image", "Icon"]:
+            return {"kind": "src", "by": step.by, "value": element_identifier}
+    return None
+
+def batch_group(steps, start):
+    # Consecutive batchable steps from start
+    group = []
+    for step in steps[start:]:
+        operation = batch_operation(step)
+        if operation is None:
+            break
+        group.append((step, operation))
+    return group
@@ -0,0 +1,129 @@
+import os
+import queue
+import threading
+import time
+from test_runner import TestRunner
+from plan_cache import PlanCache
+from session_pool import SessionPool
+from db_pool import ConnectionPool
+
+class ParallelSuiteRunner:
+    def __init__(self, webdriver_choice, workers, logger, cancel_event=None, progress=None, session_pool=None, db_pool=None, plan_cache=None, result_store=None, batch_steps=False, cache_elements=False, launch_profile=None, artifacts=None, report=None):
+        self.webdriver_choice = webdriver_choice
+        self.workers = max(1, int(workers))
+        self.logger = logger
+        # Without a shared pool every worker session is quit when the suite ends
+        self.session_pool = session_pool or SessionPool(logger, max_idle=0)
+        # Workers share database connections, a pool created here is closed when the suite ends
+        self.owns_db_pool = db_pool is None
+        self.db_pool = db_pool or ConnectionPool()
+        # Test cases listed more than once in a suite are compiled once
+        self.plan_cache = plan_cache or PlanCache()
+        self.result_store = result_store
+        self.batch_steps = batch_steps
+        self.cache_elements = cache_elements
+        self.launch_profile = launch_profile
+        self.artifacts = artifacts
+        self.cancel_event = cancel_event or threading.Event()
+        self.progress = progress
+        # Called with each result as it finishes instead of logging it, on the thread calling run()
+        self.report = report or self.emit
+        self.results = []
+
+    def run(self, test_cases):
+        pending = queue.Queue()
+        for index, test_case in enumerate(test_cases):
+            pending.put((index, test_case))
+
+        self.results = [None] * len(test_cases)
+        started = time.perf_counter()
+
+        # Workers hand finished test cases back through this queue so all
+        # logging happens on the calling thread, one test case at a time
+        finished = queue.Queue()
+        threads = []
+        for worker_id in range(min(self.workers, len(test_cases))):
+            thread = threading.Thread(target=self.worker, args=(worker_id + 1, pending, finished), daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        # Each worker puts None once it has nothing left to run
+        completed = 0
+        running = len(threads)
+        while running:
+            result = finished.get()
+            if result is None:
+                running -= 1
+                continue
+            completed += 1
+            self.results[result["index"]] = result
+            self.report(result)
+            if self.progress:
+                self.progress(completed, len(test_cases))
+        for thread in threads:
+            thread.join()
+        if self.owns_db_pool:
+            self.db_pool.close_all()
+
+        self.log_summary(time.perf_counter() - started)
+        return self.results
+
+    def worker(self, worker_id, pending, finished):
+        driver = None
+        try:
+            while not self.cancel_event.is_set():
+                try:
+                    index, test_case = pending.get_nowait()
+                except queue.Empty:
+                    break
+
+                lines = []
+                runner = TestRunner(lines.append, self.db_pool, self.result_store, self.batch_steps, self.cache_elements, self.session_pool.fixtures, self.artifacts)
+                started = time.perf_counter()
+                passed = False
+                try:
+                    steps = self.plan_cache.steps(test_case)
+                    if driver is None:
+                        driver = self.session_pool.acquire(self.webdriver_choice, self.launch_profile)
+                    passed = runner.run(steps, driver, self.cancel_event, test_case=os.path.basename(test_case))
+                except Exception as e:
+                    runner.failure = runner.failure or f"Error during testing: {e}"
+                    runner.log_with_timestamp(f"Error during testing: {e}")
+
+                # A crashed browser only costs the current test case, the
+                # worker starts a fresh session for the next one
+                if not passed and driver is not None and not self.session_pool.is_alive(driver):
+                    runner.log_with_timestamp(f"Worker {worker_id} browser session lost, starting a new one.")
+                    self.session_pool.release(driver, failed=True)
+                    driver = None
+
+                finished.put({
+                    "index": index,
+                    "test_case": test_case,
+                    "passed": passed,
+                    "duration": time.perf_counter() - started,
+                    "worker": worker_id,
+                    "log": lines,
+                    "failure": runner.failure,
+                    "profile": runner.profile,
+                })
+        finally:
+            if driver is not None:
+                self.session_pool.release(driver)
+            finished.put(None)
+
+    def emit(self, result):
+        status = "PASSED" if result["passed"] else "FAILED"
+        self.logger(f"=== {os.path.basename(result['test_case'])} (worker {result['worker']}) ===")
+        for line in result["log"]:
+            self.logger(line)
+        self.logger(f"=== {status} in {result['duration']:.2f}s ===")
+
+    def log_summary(self, elapsed):
+        finished = [result for result in self.results if result is not None]
+        failed = [result for result in finished if not result["passed"]]
+        if self.cancel_event.is_set():
+            self.logger(f"Suite stopped after {len(finished)} of {len(self.results)} test case(s).")
+        self.logger(f"Suite finished: {len(finished) - len(failed)} passed, {len(failed)} failed, {len(finished)} total in {elapsed:.2f}s using {self.workers} worker(s).")
+        for result in failed:
+            self.logger(f"  FAILED: {result['test_case']}")
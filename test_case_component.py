@@ -1,30 +1,110 @@
 import tkinter as tk
 from tkinter import ttk
-from selenium import webdriver
-from selenium.webdriver.support.ui import Select
-from selenium.webdriver.common.by import By
-import time
 import json
-
-# Import database connector libraries
-import pymysql
-import psycopg2
-import pyodbc
+import os
+import threading
+import time
+from test_runner import TestRunner, compile_test_case
+from plan_cache import PlanCache
+from suite_runner import ParallelSuiteRunner
+from session_pool import SessionPool
+from db_pool import ConnectionPool
+from run_profile import RunProfile, profile_path
+from blocks import block_class
+from spatial_index import BlockIndex
+from run_history import STORED_ORDER
+
+# Motion events are drawn at most once per frame (~60 fps)
+DRAG_FRAME_MS = 16
+
+# Blocks this far (px) above or below the visible area keep their widgets, so short scrolls
+# do not rebuild them
+VIEWPORT_MARGIN = 300
+
+# Widget sets kept per block type for reuse, anything beyond this is destroyed
+WIDGET_POOL_SIZE = 32
 
 class AutomatedTestingApp:
-    def __init__(self, master, main_panel, toolbar, logger, change_callback):
+    def __init__(self, master, main_panel, toolbar, logger, change_callback, progress_callback=None, finished_callback=None, plan_cache=None, result_store=None, artifacts=None, catalog=None, history=None):
         self.master = master
         self.main_panel = main_panel
         self.toolbar = toolbar
         self.logger = logger
         self.change_callback = change_callback  # This callback is to mark unsaved changes
+        self.progress_callback = progress_callback  # Receives run status text from the run thread
+        self.finished_callback = finished_callback  # Called from the run thread when a run ends
+        self.suite_finished = False  # Widget stats are logged by run_finished on the Tk thread
 
-        # Canvas for visual test case
+        # Canvas for visual test case, scrollable so long test cases fit
         self.canvas = tk.Canvas(self.main_panel, bg='white', bd=0, highlightthickness=0)
-        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(self.main_panel, orient=tk.VERTICAL, command=self.canvas.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.canvas.config(yscrollcommand=self.on_canvas_scroll)
+
+        # Draggable blocks keyed by their canvas tag (in creation order) and by canvas item id
+        self.blocks = {}
+        self.blocks_by_item = {}
+        self.block_counter = 0
+
+        # Block positions sorted by y for hit-testing, snapping and execution order
+        self.block_index = BlockIndex()
+
+        # Only blocks near the viewport get real Entry/Combobox widgets, the rest are drawn
+        # as a rectangle and label backed by block.values
+        self.materialized = set()
+        self.viewport_after_id = None
+        self.scroll_region = None
+
+        # Released widget sets by block type, reused instead of creating new Tk widgets
+        self.widget_pool = {}
+        self.live_widgets = 0
+
+        # Pending drag state, motion events are coalesced into one move per frame
+        self.selected_block = None
+        self.selected_block_data = None
+        self.drag_target = None
+        self.drag_position = None
+        self.drag_after_id = None
+        self.drag_moved = False
+
+        # File the canvas was loaded from or last saved to, run profiles are written next to it
+        self.current_file = None
+
+        # Database connections are pooled and reused by every run
+        self.db_pool = ConnectionPool()
+
+        # Structured step records for exports, None when nothing keeps them
+        self.result_store = result_store
+
+        # Screenshots and page sources of failed steps, one folder per run
+        self.artifacts = artifacts
 
-        # List to maintain draggable block objects
-        self.blocks = []
+        # Keeps the last result of each test case for the side panel filters
+        self.catalog = catalog
+
+        # Outcomes and durations of every run, used to order suites
+        self.history = history
+        self.suite_order = STORED_ORDER
+
+        # Execution engine shared by single runs and suites
+        self.runner = TestRunner(self.logger, self.db_pool, self.result_store, artifacts=self.artifacts)
+        self.batch_steps = False
+        self.cache_elements = False
+
+        # Browser options new sessions are started with, None for the browser defaults
+        self.launch_profile = None
+
+        # Warm browser sessions handed out per run and reused across runs
+        self.session_pool = SessionPool(self.logger)
+        self.runner.fixtures = self.session_pool.fixtures
+
+        # Compiled test cases, shared by the canvas, single runs and suites
+        self.plan_cache = plan_cache or PlanCache()
+
+        # Runs execute on a background thread so the window stays responsive
+        self.run_thread = None
+        self.cancel_event = threading.Event()
 
         # Bind mouse events for creating and moving blocks
         self.canvas.bind("<ButtonPress-1>", self.on_canvas_click)
@@ -39,170 +119,145 @@ class AutomatedTestingApp:
         # Bind right-click to open the context menu
         self.canvas.bind("<Button-3>", self.show_context_menu)
 
+        # Scrolling and resizing change which blocks need widgets
+        self.canvas.bind("<Configure>", lambda event: self.schedule_viewport_refresh())
+        self.canvas.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.canvas.bind("<Button-4>", lambda event: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda event: self.canvas.yview_scroll(1, "units"))
+
         # Bind keyboard shortcuts
         self.master.bind("<Control-v>", self.duplicate_block)
         self.master.bind("<Delete>", self.delete_block)
 
     def create_draggable_block(self, x, y, text):
-        tag = f"block_{len(self.blocks)}"
-        block = None
-        element_dropdown_window = None
-        content_type_dropdown_window = None
-        element_identifier_window = None
-        input_query_window = None
-        seconds_label = None
-
-        if text in ["Input by", "Click", "Dropdown option", "Radio button", "Static content"]:
-            block_width = {
-                "Input by": 560,
-                "Dropdown option": 660,
-                "Click": 530,
-                "Radio button": 530,
-                "Static content": 700
-            }[text]
-            block = self.canvas.create_rectangle(x, y, x + block_width, y + 50, fill="lightblue", outline="black", tags=("block", tag))
-
-            element_options = ["NAME", "ID", "CLASS_NAME", "CSS_SELECTOR", "LINK_TEXT", "PARTIAL_LINK_TEXT", "TAG_NAME", "XPATH"]
-            selected_element = tk.StringVar(value=element_options[0])
-            element_dropdown = ttk.Combobox(self.canvas, textvariable=selected_element, values=element_options, width=15)
-            element_dropdown.bind("<FocusIn>", self.on_entry_focus)
-            element_dropdown_window = self.canvas.create_window(x + (130 if text in ["Input by", "Click"] else 260 if text == "Static content" else 180), y + 25, window=element_dropdown, tags=("dropdown", tag))
-
-            entry_width = 50 if text == "Click" else 35 if text in ["Radio button", "Dropdown option"] else 30
-
-            element_identifier_entry = tk.Entry(self.canvas, width=entry_width)
-            element_identifier_entry.bind("<FocusIn>", lambda event: self.on_input_focus(event, element_identifier_entry))
-            element_identifier_entry.insert(0, "element identifier")
-            element_identifier_window = self.canvas.create_window(x + (285 if text == "Input by" else 360 if text in ["Dropdown option", "Radio button"] else 420 if text == "Static content" else 347), y + 25, window=element_identifier_entry, tags=("entry", tag))
-
-            if text == "Static content":
-                content_type_options = ["Text", "Image", "Icon"]
-                selected_content_type = tk.StringVar(value=content_type_options[0])
-                content_type_dropdown = ttk.Combobox(self.canvas, textvariable=selected_content_type, values=content_type_options, width=10)
-                content_type_dropdown.bind("<FocusIn>", self.on_entry_focus)
-                content_type_dropdown_window = self.canvas.create_window(x + 152, y + 25, window=content_type_dropdown, tags=("dropdown", tag))
-
-            if text in ["Input by", "Dropdown option", "Static content"]:
-                input_query_entry = tk.Entry(self.canvas, width=25)
-                input_query_entry.bind("<FocusIn>", lambda event: self.on_input_focus(event, input_query_entry))
-                input_query_entry.insert(0, "input")
-                input_query_window = self.canvas.create_window(x + (460 if text == "Input by" else 600 if text == "Static content" else 560), y + 25, window=input_query_entry, tags=("entry", tag))
-            
-            text_tag = self.canvas.create_text(x + (40 if text in ["Input by", "Click"] else 65), y + 25, text=text, fill="black", tags=("text", tag))
-            self.blocks.append((block, text_tag, text, content_type_dropdown if text == "Static content" else None, content_type_dropdown_window if text == "Static content" else None, element_dropdown, element_dropdown_window, element_identifier_entry, element_identifier_window, input_query_entry if text in ["Input by", "Dropdown option", "Static content"] else None, input_query_window if text in ["Input by", "Dropdown option", "Static content"] else None))
-
-        elif text == "Launch Web:":
-            block = self.canvas.create_rectangle(x, y, x + 400, y + 50, fill="lightblue", outline="black", tags=("block", tag))
-            url_entry = tk.Entry(self.canvas, width=45)
-            url_entry.bind("<FocusIn>", self.on_entry_focus)
-            input_window = self.canvas.create_window(x + 250, y + 25, window=url_entry, tags=("entry", tag))
-            text_tag = self.canvas.create_text(x + 60, y + 25, text=text, fill="black", tags=("text", tag))
-            self.blocks.append((block, text_tag, text, url_entry, input_window))
-
-        elif text == "Delay:":
-            block = self.canvas.create_rectangle(x, y, x + 200, y + 50, fill="lightblue", outline="black", tags=("block", tag))
-            delay_entry = tk.Entry(self.canvas, width=10)
-            delay_entry.bind("<FocusIn>", self.on_entry_focus)
-            input_window = self.canvas.create_window(x + 97, y + 25, window=delay_entry, tags=("entry", tag))
-            seconds_label = self.canvas.create_text(x + 160, y + 25, text="second(s)", fill="black", tags=("text", tag))
-            text_tag = self.canvas.create_text(x + 40, y + 25, text=text, fill="black", tags=("text", tag))
-            self.blocks.append((block, text_tag, text, delay_entry, input_window, seconds_label))
-
-        elif text == "Navigate":
-            block = self.canvas.create_rectangle(x, y, x + 200, y + 50, fill="lightblue", outline="black", tags=("block", tag))
-            navigation_options = ["Backward", "Forward", "Refresh"]
-            selected_navigation = tk.StringVar(value=navigation_options[0])
-            navigation_dropdown = ttk.Combobox(self.canvas, textvariable=selected_navigation, values=navigation_options, width=10)
-            navigation_dropdown.bind("<FocusIn>", self.on_entry_focus)
-            navigation_dropdown_window = self.canvas.create_window(x + 140, y + 25, window=navigation_dropdown, tags=("dropdown", tag))
-            text_tag = self.canvas.create_text(x + 50, y + 25, text=text, fill="black", tags=("text", tag))
-            self.blocks.append((block, text_tag, text, navigation_dropdown, navigation_dropdown_window))
-
-        elif text == "Database":
-            block = self.canvas.create_rectangle(x, y, x + 500, y + 80, fill="lightblue", outline="black", tags=("block", tag))
-
-            db_options = ["MySQL", "PostgreSQL", "Microsoft SQL Server"]
-            selected_db = tk.StringVar(value=db_options[0])
-            db_dropdown = ttk.Combobox(self.canvas, textvariable=selected_db, values=db_options, width=19)
-            db_dropdown.bind("<FocusIn>", self.on_entry_focus)
-            db_dropdown_window = self.canvas.create_window(x + 150, y + 29, window=db_dropdown, tags=("dropdown", tag))
-
-            host_entry = tk.Entry(self.canvas, width=17)
-            host_entry.bind("<FocusIn>", lambda event: self.on_input_focus(event, host_entry))
-            host_entry.insert(0, "Host/Server")
-            host_window = self.canvas.create_window(x + 280, y + 25, window=host_entry, tags=("entry", tag))
-
-            dbname_entry = tk.Entry(self.canvas, width=17)
-            dbname_entry.bind("<FocusIn>", lambda event: self.on_input_focus(event, dbname_entry))
-            dbname_entry.insert(0, "Database Name")
-            dbname_window = self.canvas.create_window(x + 410, y + 25, window=dbname_entry, tags=("entry", tag))
-
-            username_entry = tk.Entry(self.canvas, width=17)
-            username_entry.bind("<FocusIn>", lambda event: self.on_input_focus(event, username_entry))
-            username_entry.insert(0, "Username")
-            username_window = self.canvas.create_window(x + 280, y + 55, window=username_entry, tags=("entry", tag))
-
-            password_entry = tk.Entry(self.canvas, width=17, show="*")
-            password_entry.bind("<FocusIn>", lambda event: self.on_input_focus(event, password_entry))
-            password_entry.insert(0, "Password")
-            password_window = self.canvas.create_window(x + 410, y + 55, window=password_entry, tags=("entry", tag))
-
-            text_tag = self.canvas.create_text(x + 50, y + 25, text=text, fill="black", tags=("text", tag))
-            self.blocks.append((block, text_tag, text, db_dropdown, db_dropdown_window, host_entry, host_window, dbname_entry, dbname_window, username_entry, username_window, password_entry, password_window))
-
-        elif text == "Retrieve data":
-            block = self.canvas.create_rectangle(x, y, x + 620, y + 100, fill="lightblue", outline="black", tags=("block", tag))
-
-            select_entry = tk.Entry(self.canvas, width=15)
-            select_entry.bind("<FocusIn>", lambda event: self.on_input_focus(event, select_entry))
-            select_entry.insert(0, "SELECT data")
-            select_window = self.canvas.create_window(x + 148, y + 35, window=select_entry, tags=("entry", tag))
-
-            from_entry = tk.Entry(self.canvas, width=15)
-            from_entry.bind("<FocusIn>", lambda event: self.on_input_focus(event, from_entry))
-            from_entry.insert(0, "FROM table")
-            from_window = self.canvas.create_window(x + 250, y + 35, window=from_entry, tags=("entry", tag))
-
-            value1_entry = tk.Entry(self.canvas, width=15)
-            value1_entry.bind("<FocusIn>", lambda event: self.on_input_focus(event, value1_entry))
-            value1_entry.insert(0, "WHERE column1")
-            value1_window = self.canvas.create_window(x + 350, y + 35, window=value1_entry, tags=("entry", tag))
-
-            value2_entry = tk.Entry(self.canvas, width=15)
-            value2_entry.bind("<FocusIn>", lambda event: self.on_input_focus(event, value2_entry))
-            value2_entry.insert(0, "WHERE column2")
-            value2_window = self.canvas.create_window(x + 450, y + 35, window=value2_entry, tags=("entry", tag))
-
-            value3_entry = tk.Entry(self.canvas, width=15)
-            value3_entry.bind("<FocusIn>", lambda event: self.on_input_focus(event, value3_entry))
-            value3_entry.insert(0, "WHERE column3")
-            value3_window = self.canvas.create_window(x + 550, y + 35, window=value3_entry, tags=("entry", tag))
-
-            param1_entry = tk.Entry(self.canvas, width=15)
-            param1_entry.bind("<FocusIn>", lambda event: self.on_input_focus(event, param1_entry))
-            param1_entry.insert(0, "Value 1")
-            param1_window = self.canvas.create_window(x + 350, y + 65, window=param1_entry, tags=("entry", tag))
-
-            param2_entry = tk.Entry(self.canvas, width=15)
-            param2_entry.bind("<FocusIn>", lambda event: self.on_input_focus(event, param2_entry))
-            param2_entry.insert(0, "Value 2")
-            param2_window = self.canvas.create_window(x + 450, y + 65, window=param2_entry, tags=("entry", tag))
-
-            param3_entry = tk.Entry(self.canvas, width=15)
-            param3_entry.bind("<FocusIn>", lambda event: self.on_input_focus(event, param3_entry))
-            param3_entry.insert(0, "Value 3")
-            param3_window = self.canvas.create_window(x + 550, y + 65, window=param3_entry, tags=("entry", tag))
-
-            text_tag = self.canvas.create_text(x + 60, y + 35, text=text, fill="black", tags=("text", tag))
-            self.blocks.append((block, text_tag, text, select_entry, select_window, from_entry, from_window, value1_entry, value1_window, value2_entry, value2_window, value3_entry, value3_window, param1_entry, param1_window, param2_entry, param2_window, param3_entry, param3_window))
+        self.block_counter += 1
+        tag = f"block_{self.block_counter}"
+        block_type = block_class(text)
 
-        else:
-            block = self.canvas.create_rectangle(x, y, x + 120, y + 40, fill="lightblue", outline="black", tags=("block", tag))
-            text_tag = self.canvas.create_text(x + 60, y + 20, text=text, fill="black", tags=("text", tag))
-            self.blocks.append((block, text_tag, text))
+        # Every canvas item of a block carries its tag so the block moves and deletes as one group
+        rect = self.canvas.create_rectangle(x, y, x + block_type.WIDTH, y + block_type.HEIGHT, fill="lightblue", outline="black", tags=("block", tag))
+        text_tag = self.canvas.create_text(x + block_type.LABEL_X, y + block_type.LABEL_Y, text=text, fill="black", tags=("text", tag))
+        block = block_type(text, tag, rect, text_tag)
+
+        for label, dx, dy in block.EXTRA_TEXTS:
+            block.items.append(self.canvas.create_text(x + dx, y + dy, text=label, fill="black", tags=("text", tag)))
+
+        self.blocks[tag] = block
+        for item in block.items:
+            self.blocks_by_item[item] = block
+        self.block_index.insert(rect, (x, y, x + block_type.WIDTH, y + block_type.HEIGHT))
+
+        # Widgets are created once the block turns out to be near the viewport
+        self.schedule_viewport_refresh()
 
         # Mark changes
         self.change_callback()
+        return block
+
+    def add_block(self, text):
+        # New blocks from the menu appear at the top of the visible area
+        return self.create_draggable_block(50, self.canvas.canvasy(0) + 50, text)
+
+    def materialize_block(self, block):
+        x1, y1 = self.canvas.coords(block.rect)[:2]
+        pooled = self.widget_pool.get(block.block_type)
+        widgets = pooled.pop() if pooled else [self.create_field_widget(field) for field in block.FIELDS]
+        for field, widget, value in zip(block.FIELDS, widgets, block.values):
+            if field.kind == "combobox":
+                widget.set(value)
+            else:
+                widget.delete(0, tk.END)
+                widget.insert(0, value)
+            window = self.canvas.create_window(x1 + field.dx, y1 + field.dy, window=widget, tags=("dropdown" if field.kind == "combobox" else "entry", block.tag))
+            block.widgets.append(widget)
+            block.windows.append(window)
+            self.blocks_by_item[window] = block
+        self.materialized.add(block.rect)
+
+    def dematerialize_block(self, block):
+        block.sync_values()
+        for window in block.windows:
+            self.canvas.delete(window)
+            self.blocks_by_item.pop(window, None)
+        self.release_widgets(block.block_type, block.widgets)
+        block.windows = []
+        block.widgets = []
+        self.materialized.discard(block.rect)
+
+    def release_widgets(self, block_type, widgets):
+        if not widgets:
+            return
+        pooled = self.widget_pool.setdefault(block_type, [])
+        if len(pooled) < WIDGET_POOL_SIZE:
+            pooled.append(widgets)
+        else:
+            for widget in widgets:
+                widget.destroy()
+            self.live_widgets -= len(widgets)
+
+    def widget_stats(self):
+        pooled = {block_type: sum(len(widgets) for widgets in sets) for block_type, sets in self.widget_pool.items() if sets}
+        return {
+            "live": self.live_widgets,
+            "in_use": sum(len(self.blocks_by_item[rect].widgets) for rect in self.materialized),
+            "pooled": sum(pooled.values()),
+            "pooled_by_type": pooled,
+            "blocks": len(self.blocks),
+        }
+
+    def log_widget_stats(self):
+        stats = self.widget_stats()
+        pooled = ", ".join(f"{block_type}: {count}" for block_type, count in stats["pooled_by_type"].items()) or "none"
+        self.runner.log_with_timestamp(f"Widgets: {stats['live']} live, {stats['in_use']} on {stats['blocks']} block(s), {stats['pooled']} pooled ({pooled})")
+        return stats
+
+    def schedule_viewport_refresh(self):
+        if self.viewport_after_id is None:
+            self.viewport_after_id = self.canvas.after_idle(self.refresh_viewport)
+
+    def refresh_viewport(self):
+        self.viewport_after_id = None
+
+        # Only touch the scroll region when it changes, setting it re-triggers yscrollcommand
+        scroll_region = (0, 0, self.canvas.winfo_width(), self.block_index.bottom() + 100)
+        if scroll_region != self.scroll_region:
+            self.scroll_region = scroll_region
+            self.canvas.config(scrollregion=scroll_region)
+
+        top = self.canvas.canvasy(0) - VIEWPORT_MARGIN
+        bottom = self.canvas.canvasy(self.canvas.winfo_height()) + VIEWPORT_MARGIN
+        visible = set(self.block_index.in_range(top, bottom))
+
+        for rect in self.materialized - visible:
+            # Never pull the widgets out from under a block that is being dragged
+            if rect != self.selected_block:
+                self.dematerialize_block(self.blocks_by_item[rect])
+        for rect in visible - self.materialized:
+            block = self.blocks_by_item[rect]
+            if block.FIELDS:
+                self.materialize_block(block)
+
+    def on_canvas_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.schedule_viewport_refresh()
+
+    def on_mouse_wheel(self, event):
+        self.canvas.yview_scroll(int(-event.delta / 120), "units")
+
+    def create_field_widget(self, field):
+        if field.kind == "combobox":
+            widget = ttk.Combobox(self.canvas, values=field.options, width=field.width)
+            widget.set(field.options[field.default])
+            widget.bind("<FocusIn>", self.on_entry_focus)
+        else:
+            widget = tk.Entry(self.canvas, width=field.width, show=field.show or "")
+            if field.placeholder is not None:
+                widget.insert(0, field.placeholder)
+                widget.bind("<FocusIn>", lambda event: self.on_input_focus(event, widget))
+            else:
+                widget.bind("<FocusIn>", self.on_entry_focus)
+        self.live_widgets += 1
+        return widget
 
     def on_input_focus(self, event, entry):
         self.deselect_block()
@@ -210,129 +265,59 @@ class AutomatedTestingApp:
 
     def on_canvas_click(self, event):
         self.select_block(event)
+        self.drag_moved = False
 
     def on_canvas_drag(self, event):
+        # Motion events only record the target, the block is moved at most once per frame
         if hasattr(self, 'selected_block') and self.selected_block is not None:
-            delta_x = event.x - self.canvas.coords(self.selected_block)[0]
-            delta_y = event.y - self.canvas.coords(self.selected_block)[1]
-            self.canvas.move(self.selected_block, delta_x, delta_y)
-
-            if self.selected_text_tag:
-                self.canvas.move(self.selected_text_tag, delta_x, delta_y)
-
-            if self.selected_block_data[2] in ["Input by", "Click", "Dropdown option", "Radio button", "Static content"]:
-                if self.selected_block_data[2] == "Static content":
-                    self.canvas.move(self.selected_block_data[4], delta_x, delta_y)
-                self.canvas.move(self.selected_block_data[6], delta_x, delta_y)
-                self.canvas.move(self.selected_block_data[8], delta_x, delta_y)
-                if self.selected_block_data[2] in ["Input by", "Dropdown option", "Static content"]:
-                    self.canvas.move(self.selected_block_data[10], delta_x, delta_y)
-
-            if self.selected_block_data[2] == "Launch Web:":
-                self.canvas.move(self.selected_block_data[4], delta_x, delta_y)
-
-            if self.selected_block_data[2] == "Delay:":
-                self.canvas.move(self.selected_block_data[4], delta_x, delta_y)
-                self.canvas.move(self.selected_block_data[5], delta_x, delta_y)
-
-            if self.selected_block_data[2] == "Navigate":
-                self.canvas.move(self.selected_block_data[4], delta_x, delta_y)
-
-            if self.selected_block_data[2] == "Database":
-                self.canvas.move(self.selected_block_data[4], delta_x, delta_y)
-                self.canvas.move(self.selected_block_data[6], delta_x, delta_y)
-                self.canvas.move(self.selected_block_data[8], delta_x, delta_y)
-                self.canvas.move(self.selected_block_data[10], delta_x, delta_y)
-                self.canvas.move(self.selected_block_data[12], delta_x, delta_y)
-
-            if self.selected_block_data[2] == "Retrieve data":
-                self.canvas.move(self.selected_block_data[4], delta_x, delta_y)
-                self.canvas.move(self.selected_block_data[6], delta_x, delta_y)
-                self.canvas.move(self.selected_block_data[8], delta_x, delta_y)
-                self.canvas.move(self.selected_block_data[10], delta_x, delta_y)
-                self.canvas.move(self.selected_block_data[12], delta_x, delta_y)
-                self.canvas.move(self.selected_block_data[14], delta_x, delta_y)
-                self.canvas.move(self.selected_block_data[16], delta_x, delta_y)
-                self.canvas.move(self.selected_block_data[18], delta_x, delta_y)
-
-            self.canvas.tag_raise(self.selected_block)
-            if self.selected_text_tag:
-                self.canvas.tag_raise(self.selected_text_tag)
-
-            for tag in self.canvas.gettags(self.selected_block):
-                if tag.startswith("entry") or tag.startswith("dropdown"):
-                    self.canvas.tag_raise(tag)
-                if tag.startswith("text") and len(tag.split("_")) > 1:
-                    self.canvas.tag_raise(tag)
-
-            if self.selected_block_data[2] == "Delay:":
-                self.canvas.tag_raise(self.selected_block_data[5])
+            self.drag_target = (self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+            if self.drag_after_id is None:
+                self.drag_after_id = self.canvas.after(DRAG_FRAME_MS, self.flush_drag)
 
-            # Mark changes
-            self.change_callback()
+    def flush_drag(self):
+        self.drag_after_id = None
+        if self.drag_target is None or self.selected_block is None:
+            return
+        target_x, target_y = self.drag_target
+        self.drag_target = None
+        x1, y1 = self.drag_position
+        if (target_x, target_y) != (x1, y1):
+            self.canvas.move(self.selected_block_data.tag, target_x - x1, target_y - y1)
+            self.drag_position = (target_x, target_y)
+            self.drag_moved = True
+
+    def cancel_drag(self):
+        if self.drag_after_id is not None:
+            self.canvas.after_cancel(self.drag_after_id)
+            self.drag_after_id = None
+        self.drag_target = None
 
     def on_canvas_release(self, event):
         if hasattr(self, 'selected_block') and self.selected_block is not None:
+            # Apply the last motion event that has not been drawn yet
+            if self.drag_after_id is not None:
+                self.canvas.after_cancel(self.drag_after_id)
+                self.flush_drag()
+            if not self.drag_moved:
+                return
+            self.drag_moved = False
+
             x1, y1, x2, y2 = self.canvas.coords(self.selected_block)
-            closest_block = None
-            closest_distance = float('inf')
-
-            for block in self.blocks:
-                if block[0] == self.selected_block:
-                    continue
-                bx1, by1, bx2, by2 = self.canvas.coords(block[0])
-                distance = abs(y1 - by2)
-                if distance < closest_distance and distance < 50:
-                    closest_distance = distance
-                    closest_block = block
-
-            if closest_block:
-                bx1, by1, bx2, by2 = self.canvas.coords(closest_block[0])
+            closest_block = self.block_index.nearest_bottom(y1, 50, exclude=self.selected_block)
+
+            if closest_block is not None:
+                bx1, by1, bx2, by2 = self.block_index.bounds[closest_block]
                 self.snap_to_block(y1, by2)
 
+            self.block_index.move(self.selected_block, tuple(self.canvas.coords(self.selected_block)))
+            self.schedule_viewport_refresh()
+
             # Mark changes
             self.change_callback()
 
     def snap_to_block(self, current_pos, target_pos):
         offset = target_pos - current_pos
-        self.canvas.move(self.selected_block, 0, offset)
-        if self.selected_text_tag:
-            self.canvas.move(self.selected_text_tag, 0, offset)
-
-        if self.selected_block_data[2] in ["Input by", "Click", "Dropdown option", "Radio button", "Static content"]:
-                if self.selected_block_data[2] == "Static content":
-                    self.canvas.move(self.selected_block_data[4], 0, offset)
-                self.canvas.move(self.selected_block_data[6], 0, offset)
-                self.canvas.move(self.selected_block_data[8], 0, offset)
-                if self.selected_block_data[2] in ["Input by", "Dropdown option", "Static content"]:
-                    self.canvas.move(self.selected_block_data[10], 0, offset)
-
-        if self.selected_block_data[2] == "Launch Web:":
-            self.canvas.move(self.selected_block_data[4], 0, offset)
-
-        if self.selected_block_data[2] == "Delay:":
-            self.canvas.move(self.selected_block_data[4], 0, offset)
-            self.canvas.move(self.selected_block_data[5], 0, offset)
-
-        if self.selected_block_data[2] == "Navigate":
-            self.canvas.move(self.selected_block_data[4], 0, offset)
-
-        if self.selected_block_data[2] == "Database":
-            self.canvas.move(self.selected_block_data[4], 0, offset)
-            self.canvas.move(self.selected_block_data[6], 0, offset)
-            self.canvas.move(self.selected_block_data[8], 0, offset)
-            self.canvas.move(self.selected_block_data[10], 0, offset)
-            self.canvas.move(self.selected_block_data[12], 0, offset)
-        
-        if self.selected_block_data[2] == "Retrieve data":
-            self.canvas.move(self.selected_block_data[4], 0, offset)
-            self.canvas.move(self.selected_block_data[6], 0, offset)
-            self.canvas.move(self.selected_block_data[8], 0, offset)
-            self.canvas.move(self.selected_block_data[10], 0, offset)
-            self.canvas.move(self.selected_block_data[12], 0, offset)
-            self.canvas.move(self.selected_block_data[14], 0, offset)
-            self.canvas.move(self.selected_block_data[16], 0, offset)
-            self.canvas.move(self.selected_block_data[18], 0, offset)
+        self.canvas.move(self.selected_block_data.tag, 0, offset)
 
     def show_context_menu(self, event):
         self.deselect_block()
@@ -341,48 +326,31 @@ class AutomatedTestingApp:
             self.context_menu.post(event.x_root, event.y_root)
 
     def select_block(self, event):
-        block_tags = self.canvas.find_withtag("block")
-        block_tags = sorted(block_tags, key=lambda b: self.canvas.coords(b)[1], reverse=True)
-
-        block_found = False
-
-        for block in block_tags:
-            x1, y1, x2, y2 = self.canvas.coords(block)
-            if x1 <= event.x <= x2 and y1 <= event.y <= y2:
-                if hasattr(self, 'selected_block') and self.selected_block == block:
-                    self.deselect_block()
-                    return
-
-                self.deselect_block(reset_data=False)
-                self.selected_block = block
-                self.selected_text_tag = None
-                for b in self.blocks:
-                    if b[0] == block:
-                        self.selected_text_tag = b[1]
-                        self.selected_block_data = b
-                        block_found = True
-                        break
-                self.canvas.tag_raise(block)
-                if self.selected_text_tag:
-                    self.canvas.tag_raise(self.selected_text_tag)
-                self.canvas.itemconfig(block, fill="yellow")
-
-                for tag in self.canvas.gettags(block):
-                    if tag.startswith("entry") or tag.startswith("dropdown"):
-                        self.canvas.tag_raise(tag)
-                    if tag.startswith("text") and len(tag.split("_")) > 1:
-                        self.canvas.tag_raise(tag)
-
-                self.master.focus()
-                break
-
-        if not block_found:
+        block = self.block_index.hit_test(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+        if block is None:
             self.deselect_block(reset_data=True)
+            return
+
+        if hasattr(self, 'selected_block') and self.selected_block == block:
+            self.deselect_block()
+            return
+
+        self.deselect_block(reset_data=False)
+        block_data = self.blocks_by_item[block]
+        self.selected_block = block
+        self.drag_position = self.block_index.bounds[block][:2]
+        self.selected_text_tag = block_data.text_tag
+        self.selected_block_data = block_data
+        self.canvas.tag_raise(block_data.tag)
+        self.canvas.itemconfig(block, fill="yellow")
+
+        self.master.focus()
 
     def deselect_block(self, reset_data=True):
+        self.cancel_drag()
         if hasattr(self, 'selected_block_data') and self.selected_block_data is not None:
             block_data = self.selected_block_data
-            self.canvas.itemconfig(block_data[0], fill="lightblue")
+            self.canvas.itemconfig(block_data.rect, fill="lightblue")
         self.selected_block = None
         self.selected_text_tag = None
         if reset_data:
@@ -391,517 +359,279 @@ class AutomatedTestingApp:
     def duplicate_block(self, event=None):
         if hasattr(self, 'selected_block_data') and self.selected_block_data:
             block_data = self.selected_block_data
-            x1, y1, x2, y2 = self.canvas.coords(block_data[0])
-            new_x = x1 + 20
-            new_y = y1 + 20
-            text = block_data[2]
-            self.create_draggable_block(new_x, new_y, text)
-            new_block_data = self.blocks[-1]
-
-            if text in ["Input by", "Click", "Dropdown option", "Radio button", "Static content"]:
-                if text == "Static content":
-                    new_block_data[3].set(block_data[3].get())
-                    new_block_data[5].set(block_data[5].get())
-                    new_block_data[7].delete(0, tk.END)
-                    new_block_data[7].insert(0, block_data[7].get())
-                    new_block_data[9].delete(0, tk.END)
-                    new_block_data[9].insert(0, block_data[9].get())
-                else:
-                    new_block_data[5].set(block_data[5].get())
-                    new_block_data[7].delete(0, tk.END)
-                    new_block_data[7].insert(0, block_data[7].get())
-                    if text in ["Input by", "Dropdown option"]:
-                        new_block_data[9].delete(0, tk.END)
-                        new_block_data[9].insert(0, block_data[9].get())
-            elif text == "Launch Web:":
-                new_block_data[3].delete(0, tk.END)
-                new_block_data[3].insert(0, block_data[3].get())
-            elif text == "Delay:":
-                new_block_data[3].delete(0, tk.END)
-                new_block_data[3].insert(0, block_data[3].get())
-            elif text == "Navigate":
-                new_block_data[3].set(block_data[3].get())
-            elif text == "Database":
-                new_block_data[3].set(block_data[3].get())  # db_dropdown
-                new_block_data[5].delete(0, tk.END)  # host_entry
-                new_block_data[5].insert(0, block_data[5].get())
-                new_block_data[7].delete(0, tk.END)  # dbname_entry
-                new_block_data[7].insert(0, block_data[7].get())
-                new_block_data[9].delete(0, tk.END)  # username_entry
-                new_block_data[9].insert(0, block_data[9].get())
-                new_block_data[11].delete(0, tk.END)  # password_entry
-                new_block_data[11].insert(0, block_data[11].get())
-            elif text == "Retrieve data":
-                new_block_data[3].delete(0, tk.END)  
-                new_block_data[3].insert(0, block_data[3].get())
-                new_block_data[5].delete(0, tk.END)  
-                new_block_data[5].insert(0, block_data[5].get())
-                new_block_data[7].delete(0, tk.END)  
-                new_block_data[7].insert(0, block_data[7].get())
-                new_block_data[9].delete(0, tk.END)  
-                new_block_data[9].insert(0, block_data[9].get())
-                new_block_data[11].delete(0, tk.END)  
-                new_block_data[11].insert(0, block_data[11].get())
-                new_block_data[13].delete(0, tk.END)  
-                new_block_data[13].insert(0, block_data[13].get())
-                new_block_data[15].delete(0, tk.END)  
-                new_block_data[15].insert(0, block_data[15].get())
-                new_block_data[17].delete(0, tk.END)  
-                new_block_data[17].insert(0, block_data[17].get())
+            x1, y1, x2, y2 = self.canvas.coords(block_data.rect)
+            new_block_data = self.create_draggable_block(x1 + 20, y1 + 20, block_data.block_type)
+            new_block_data.set_values(block_data.get_values())
+
             # Mark changes
             self.change_callback()
 
     def delete_block(self, event=None):
         if hasattr(self, 'selected_block_data') and self.selected_block_data:
             block_data = self.selected_block_data
-            self.canvas.delete(block_data[0])
-            self.canvas.delete(block_data[1])
-            if block_data[2] in ["Input by", "Click", "Dropdown option", "Radio button", "Static content"]:
-                self.canvas.delete(block_data[6])
-                self.canvas.delete(block_data[8])
-                if block_data[2] == "Static content":
-                    self.canvas.delete(block_data[4])
-                if block_data[2] in ["Input by", "Dropdown option", "Static content"]:
-                    self.canvas.delete(block_data[10])
-            elif block_data[2] == "Launch Web:":
-                self.canvas.delete(block_data[4])
-            elif block_data[2] == "Delay:":
-                self.canvas.delete(block_data[4])
-                self.canvas.delete(block_data[5])
-            elif block_data[2] == "Navigate":
-                self.canvas.delete(block_data[4])
-            elif block_data[2] == "Database":
-                self.canvas.delete(block_data[4])
-                self.canvas.delete(block_data[6])
-                self.canvas.delete(block_data[8])
-                self.canvas.delete(block_data[10])
-                self.canvas.delete(block_data[12])
-            elif block_data[2] == "Retrieve data":
-                self.canvas.delete(block_data[4])
-                self.canvas.delete(block_data[6])
-                self.canvas.delete(block_data[8])
-                self.canvas.delete(block_data[10])
-                self.canvas.delete(block_data[12])
-                self.canvas.delete(block_data[14])
-                self.canvas.delete(block_data[16])
-                self.canvas.delete(block_data[18])
-            self.blocks.remove(block_data)
+            self.remove_block(block_data)
             self.selected_block_data = None
 
             # Mark changes
             self.change_callback()
 
+    def remove_block(self, block):
+        self.dematerialize_block(block)
+        self.canvas.delete(block.tag)
+        self.block_index.remove(block.rect)
+        del self.blocks[block.tag]
+        for item in block.items:
+            self.blocks_by_item.pop(item, None)
+
     def on_entry_focus(self, event):
         self.deselect_block()
 
     def start_testing(self, webdriver_choice, driver=None):
+        if self.is_running():
+            self.runner.log_with_timestamp("A run is already in progress.")
+            return
         try:
-            sorted_blocks = sorted(self.blocks, key=lambda block: self.canvas.coords(block[0])[1])
-
-            if driver is None:
-                if webdriver_choice == "Chrome":
-                    driver = webdriver.Chrome()
-                elif webdriver_choice == "Edge":
-                    driver = webdriver.Edge()
-                elif webdriver_choice == "Firefox":
-                    driver = webdriver.Firefox()
-                else:
-                    raise ValueError(f"Unsupported WebDriver choice: {webdriver_choice}")
-
+            # Widget values are read here on the Tk thread, the steps then run in the background
+            steps = compile_test_case(self.get_test_case_data())
+        except Exception as e:
+            self.runner.log_with_timestamp(f"Error during testing: {e}")
+            return
+        self.run_in_background(self.execute_steps, steps, webdriver_choice, driver, self.current_file)
+
+    def execute_steps(self, steps, webdriver_choice, driver, test_case_file):
+        label = os.path.basename(test_case_file) if test_case_file else "Test case"
+        progress = lambda step, total: self.report_progress(f"{label}: step {step} of {total}")
+        self.run_steps(steps, webdriver_choice, driver, progress, label, test_case_file)
+        self.save_profile(self.runner.profile, test_case_file)
+
+    def run_steps(self, steps, webdriver_choice, driver, progress, name, test_case_file=None):
+        # The header and footer lines let the log view filter by test case
+        self.logger(f"=== {name} ===")
+        started = time.perf_counter()
+        passed = False
+        if driver is not None:
             self.driver = driver
-
-            element_finders = {
-                "NAME": By.NAME,
-                "ID": By.ID,
-                "CLASS_NAME": By.CLASS_NAME,
-                "CSS_SELECTOR": By.CSS_SELECTOR,
-                "LINK_TEXT": By.LINK_TEXT,
-                "PARTIAL_LINK_TEXT": By.PARTIAL_LINK_TEXT,
-                "TAG_NAME": By.TAG_NAME,
-                "XPATH": By.XPATH,
-            }
-
-            for block in sorted_blocks:
-                action_text = block[2]
-                if action_text in ["Input by", "Dropdown option"]:
-                    element_type = block[5].get()
-                    element_identifier = block[7].get()
-                    query = block[9].get()
-                    if element_type and element_identifier and query:
-                        by_type = element_finders.get(element_type)
-                        if by_type:
-                            if action_text == "Input by":
-                                element = self.driver.find_element(by_type, element_identifier)
-                                element.clear()
-                                element.send_keys(query)
-                                self.log_with_timestamp(f"Input '{query}' into element found by {element_type} with identifier '{element_identifier}'.")
-                            else:
-                                element = Select(self.driver.find_element(by_type, element_identifier))
-                                element.select_by_visible_text(query)
-                                self.log_with_timestamp(f"Input '{query}' into element found by {element_type} with identifier '{element_identifier}'.")
-                elif action_text in ["Click", "Radio button"]:
-                    element_type = block[5].get()
-                    element_identifier = block[7].get()
-                    if element_type and element_identifier:
-                        by_type = element_finders.get(element_type)
-                        if by_type:
-                            element = self.driver.find_element(by_type, element_identifier)
-                            element.click()
-                            if action_text == "Click":
-                                self.log_with_timestamp(f"Clicked on element found by {element_type} with identifier '{element_identifier}'.")
-                            else:
-                                self.log_with_timestamp(f"Clicked radio button found by {element_type} with identifier '{element_identifier}'.")
-                elif action_text == "Static content":
-                    content_type = block[3].get()
-                    element_type = block[5].get()
-                    element_identifier = block[7].get()
-                    query = block[9].get()
-
-                    by_type = element_finders.get(element_type)
-                    if by_type:
-                        element = self.driver.find_element(by_type, element_identifier)
-                        if content_type == "Text":
-                            if element.text == query:
-                                self.log_with_timestamp(f"Verified text '{query}' in element found by {element_type} with identifier '{element_identifier}'.")
-                            else:
-                                self.log_with_timestamp(f"Text mismatch: expected '{query}', found '{element.text}' in element found by {element_type} with identifier '{element_identifier}'.")
-                        elif content_type in ["Image", "Icon"]:
-                            if element.get_attribute('src') == query:
-                                self.log_with_timestamp(f"Verified {content_type.lower()} '{query}' in element found by {element_type} with identifier '{element_identifier}'.")
-                            else:
-                                self.log_with_timestamp(f"Source mismatch: expected '{query}', found '{element.get_attribute('src')}' in element found by {element_type} with identifier '{element_identifier}'.")
-                elif action_text == "Launch Web:":
-                    url = block[3].get()
-                    if url:
-                        self.driver.get(url)
-                        self.log_with_timestamp(f"Launched {url}.")
-                elif action_text == "Navigate":
-                    navigation_action = block[3].get()
-                    if navigation_action == "Backward":
-                        self.driver.back()
-                        self.log_with_timestamp("Navigated backward.")
-                    elif navigation_action == "Forward":
-                        self.driver.forward()
-                        self.log_with_timestamp("Navigated forward.")
-                    elif navigation_action == "Refresh":
-                        self.driver.refresh()
-                        self.log_with_timestamp("Page refreshed.")
-                elif action_text == "Delay:":
-                    delay = block[3].get()
-                    if delay:
-                        time.sleep(int(delay))
-                        self.log_with_timestamp(f"Delay for {delay} seconds.")
-                elif action_text == "Database":
-                    db_type = block[3].get()
-                    host = block[5].get()
-                    dbname = block[7].get()
-                    username = block[9].get()
-                    password = block[11].get()
-                    connection_details = {
-                        "host": host,
-                        "dbname": dbname,
-                        "username": username,
-                        "password": password
-                    }
-                    self.connect_to_database(db_type, connection_details)
-                elif action_text == "Retrieve data":
-                    # Check conditions for optional parameters
-                    col3_needed = not (block[17].get() == "" or block[17].get() == "Value 3" or block[11].get() == "" or block[11].get() == "WHERE column3")
-                    col2_needed = not (block[15].get() == "" or block[15].get() == "Value 2" or block[9].get() == "" or block[9].get() == "WHERE column2")
-                    
-                    # Construct SQL query based on needed columns
-                    if col3_needed and col2_needed:
-                        sql_query = f"SELECT {block[3].get()} FROM {block[5].get()} WHERE {block[7].get()} = %s AND {block[9].get()} = %s AND {block[11].get()} = %s"
-                        parameters = (block[13].get(), block[15].get(), block[17].get())
-                    elif col2_needed:
-                        sql_query = f"SELECT {block[3].get()} FROM {block[5].get()} WHERE {block[7].get()} = %s AND {block[9].get()} = %s"
-                        parameters = (block[13].get(), block[15].get())
-                    else:
-                        sql_query = f"SELECT {block[3].get()} FROM {block[5].get()} WHERE {block[7].get()} = %s"
-                        parameters = (block[13].get(),)
-                    
-                    self.retrieve_data(sql_query, parameters)
+            passed = self.runner.run(steps, self.driver, self.cancel_event, progress, name)
+        else:
+            self.driver = self.session_pool.acquire(webdriver_choice, self.launch_profile)
+            try:
+                passed = self.runner.run(steps, self.driver, self.cancel_event, progress, name)
+            finally:
+                # Only a dead session is recycled, a failed verification or Stop leaves it usable
+                self.session_pool.release(self.driver, failed=not passed and not self.session_pool.is_alive(self.driver))
+                self.driver = None
+        duration = time.perf_counter() - started
+        self.logger(f"=== {'PASSED' if passed else 'FAILED'} in {duration:.2f}s ===")
+        self.record_result(test_case_file, passed, duration, name)
+        return passed
+
+    def record_result(self, test_case_file, passed, duration, name=None):
+        # Unsaved canvases only have a label, they are not recorded
+        if not test_case_file:
+            return
+        try:
+            if self.catalog is not None:
+                self.catalog.record_result(os.path.basename(test_case_file), passed)
+            if self.history is not None:
+                self.history.record(test_case_file, passed, duration)
         except Exception as e:
-            self.log_with_timestamp(f"Error during testing: {e}")
-
-    def connect_to_database(self, db_type, connection_details):
-        self.log_with_timestamp(f"Connecting to {db_type} with details: {connection_details}")
+            self.runner.log_with_timestamp(f"Failed to record the result of {name or os.path.basename(test_case_file)}: {e}")
+
+    def save_profile(self, profile, path, log_summary=True):
+        # Unsaved canvases have nowhere to put the file, they only get the log summary
+        if path:
+            try:
+                profile.save(profile_path(path))
+            except OSError as e:
+                self.runner.log_with_timestamp(f"Failed to save run profile: {e}")
+        if log_summary:
+            for line in profile.summary_lines():
+                self.logger(line)
+
+    def set_batch_steps(self, batch_steps):
+        self.batch_steps = batch_steps
+        self.runner.batch_steps = batch_steps
+
+    def set_cache_elements(self, cache_elements):
+        self.cache_elements = cache_elements
+        self.runner.cache_elements = cache_elements
+
+    def set_launch_profile(self, profile):
+        self.launch_profile = profile
+
+    def set_suite_order(self, order):
+        self.suite_order = order
+
+    def schedule_suite(self, test_cases):
+        if self.history is None or self.suite_order == STORED_ORDER:
+            return test_cases
         try:
-            if db_type == "MySQL":
-                self.connection = pymysql.connect(
-                    host=connection_details['host'],
-                    user=connection_details['username'],
-                    password=connection_details['password'],
-                    database=connection_details['dbname']
-                )
-            elif db_type == "PostgreSQL":
-                self.connection = psycopg2.connect(
-                    host=connection_details['host'],
-                    user=connection_details['username'],
-                    password=connection_details['password'],
-                    dbname=connection_details['dbname']
-                )
-            elif db_type == "Microsoft SQL Server":
-                connection_string = (
-                    f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-                    f"SERVER={connection_details['host']};"
-                    f"DATABASE={connection_details['dbname']};"
-                    f"UID={connection_details['username']};"
-                    f"PWD={connection_details['password']}"
-                )
-                self.connection = pyodbc.connect(connection_string)
-            self.log_with_timestamp(f"Connected to {db_type} database.")
+            ordered = self.history.order(test_cases, self.suite_order)
         except Exception as e:
-            self.log_with_timestamp(f"Failed to connect to {db_type} database: {e}")
+            self.runner.log_with_timestamp(f"Failed to order the suite from run history, using stored order: {e}")
+            return test_cases
+        if ordered:
+            self.runner.log_with_timestamp(f"Suite order: {self.suite_order.lower()}, running {len(ordered)} of {len(test_cases)} test case(s).")
+        else:
+            self.runner.log_with_timestamp("No test case in the suite failed on its last run, nothing to rerun.")
+        return ordered
+
+    def run_in_background(self, target, *args):
+        self.cancel_event = threading.Event()
+        if self.artifacts is not None:
+            self.artifacts.rotate()
+        self.run_thread = threading.Thread(target=self.run_worker, args=(target,) + args, daemon=True)
+        self.run_thread.start()
 
-    def retrieve_data(self, sql_query, parameters):
+    def run_worker(self, target, *args):
         try:
-            print(f"Executing SQL Query: {sql_query} with parameters: {parameters}")  # Debug print statement
-            with self.connection.cursor() as cursor:
-                cursor.execute(sql_query, parameters)
-                result = cursor.fetchone()  # or use cursor.fetchall() if you expect multiple rows
-                if result:
-                    self.log_with_timestamp("Data retrieved successfully.")
-                else:
-                    self.log_with_timestamp("No data found.")
+            target(*args)
         except Exception as e:
-            self.log_with_timestamp(f"Failed to retrieve data: {e}")
-            print(f"Error: {e}")  # Debug print statement
-
-    def log_with_timestamp(self, message):
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-        self.logger(f"[{timestamp}] {message}")
+            self.runner.log_with_timestamp(f"Error during testing: {e}")
+        finally:
+            if self.finished_callback:
+                self.finished_callback()
+
+    def run_finished(self):
+        # Called on the Tk thread once the finished callback has been handled
+        if self.suite_finished:
+            self.suite_finished = False
+            self.log_widget_stats()
+
+    def stop_testing(self):
+        if self.is_running():
+            self.cancel_event.set()
+            self.runner.log_with_timestamp("Stopping after the current step...")
+
+    def is_running(self):
+        return self.run_thread is not None and self.run_thread.is_alive()
+
+    def shutdown(self):
+        self.stop_testing()
+        self.session_pool.quit_all()
+        self.db_pool.close_all()
+
+    def report_progress(self, status):
+        if self.progress_callback:
+            self.progress_callback(status)
+
+    def get_test_case_data(self):
+        # Blocks come out top to bottom, so compiling the plan does not need to re-sort them
+        test_case_data = []
+        for rect in self.block_index.ordered():
+            block = self.blocks_by_item[rect]
+            test_case_data.append({
+                'type': block.block_type,
+                'coords': list(self.block_index.bounds[rect]),
+                'values': block.get_values()
+            })
+        return test_case_data
 
     def save_test_case(self, filename):
-        test_case_data = []
-        for block in self.blocks:
-            block_data = {
-                'type': block[2],
-                'coords': self.canvas.coords(block[0]),
-                'values': []
-            }
-            if block[2] in ["Input by", "Click", "Dropdown option", "Radio button", "Static content"]:
-                if block[2] == "Static content":
-                    block_data['values'] = [block[3].get(), block[5].get(), block[7].get(), block[9].get()]
-                else:
-                    block_data['values'] = [block[5].get(), block[7].get()]
-                    if block[2] in ["Input by", "Dropdown option"]:
-                        block_data['values'].append(block[9].get())
-            elif block[2] == "Launch Web:":
-                block_data['values'] = [block[3].get()]
-            elif block[2] == "Delay:":
-                block_data['values'] = [block[3].get()]
-            elif block[2] == "Navigate":
-                block_data['values'] = [block[3].get()]
-            elif block[2] == "Database":
-                block_data['values'] = [
-                    block[3].get(),  # Database type
-                    block[5].get(),  # Host
-                    block[7].get(),  # Database Name
-                    block[9].get(),  # Username
-                    block[11].get()  # Password
-                ]
-            elif block[2] == "Retrieve data":
-                block_data['values'] = [
-                    block[3].get(), 
-                    block[5].get(), 
-                    block[7].get(),
-                    block[9].get(),
-                    block[11].get(),
-                    block[13].get(),
-                    block[15].get(),
-                    block[17].get()  
-                ]
-            test_case_data.append(block_data)
+        test_case_data = self.get_test_case_data()
 
         with open(filename, 'w') as file:
             json.dump(test_case_data, file)
+        self.current_file = filename
 
         # Mark changes
         self.change_callback()
 
     def load_test_case(self, filename):
         self.clear_canvas()
-        with open(filename, 'r') as file:
-            test_case_data = json.load(file)
+        test_case_data = self.plan_cache.load(filename).data
+        self.current_file = filename
 
-        for block_data in test_case_data:
-            x, y, _, _ = block_data['coords']
-            text = block_data['type']
-            self.create_draggable_block(x, y, text)
-            new_block = self.blocks[-1]
-
-            if text in ["Input by", "Click", "Dropdown option", "Radio button", "Static content"]:
-                if text == "Static content":
-                    new_block[3].set(block_data['values'][0])
-                    new_block[5].set(block_data['values'][1])
-                    new_block[7].delete(0, tk.END)
-                    new_block[7].insert(0, block_data['values'][2])
-                    new_block[9].delete(0, tk.END)
-                    new_block[9].insert(0, block_data['values'][3])
-                else:
-                    new_block[5].set(block_data['values'][0])
-                    new_block[7].delete(0, tk.END)
-                    new_block[7].insert(0, block_data['values'][1])
-                    if text in ["Input by", "Dropdown option"]:
-                        new_block[9].delete(0, tk.END)
-                        new_block[9].insert(0, block_data['values'][2])
-            elif text == "Launch Web:":
-                new_block[3].delete(0, tk.END)
-                new_block[3].insert(0, block_data['values'][0])
-            elif text == "Delay:":
-                new_block[3].delete(0, tk.END)
-                new_block[3].insert(0, block_data['values'][0])
-            elif text == "Navigate":
-                new_block[3].set(block_data['values'][0])
-            elif text == "Database":
-                new_block[3].set(block_data['values'][0])  # Database type
-                new_block[5].delete(0, tk.END)  # Host
-                new_block[5].insert(0, block_data['values'][1])
-                new_block[7].delete(0, tk.END)  # Database Name
-                new_block[7].insert(0, block_data['values'][2])
-                new_block[9].delete(0, tk.END)  # Username
-                new_block[9].insert(0, block_data['values'][3])
-                new_block[11].delete(0, tk.END)  # Password
-                new_block[11].insert(0, block_data['values'][4])
-            elif text == "Retrieve data":
-                new_block[3].delete(0, tk.END)
-                new_block[3].insert(0, block_data['values'][0]) 
-                new_block[5].delete(0, tk.END)  # Host
-                new_block[5].insert(0, block_data['values'][1])
-                new_block[7].delete(0, tk.END)  # Database Name
-                new_block[7].insert(0, block_data['values'][2])
-                new_block[9].delete(0, tk.END)  # Username
-                new_block[9].insert(0, block_data['values'][3])
-                new_block[11].delete(0, tk.END)  # Password
-                new_block[11].insert(0, block_data['values'][4])
-                new_block[13].delete(0, tk.END)  # Database Name
-                new_block[13].insert(0, block_data['values'][5])
-                new_block[15].delete(0, tk.END)  # Username
-                new_block[15].insert(0, block_data['values'][6])
-                new_block[17].delete(0, tk.END)  # Password
-                new_block[17].insert(0, block_data['values'][7])
+        self.load_blocks(test_case_data)
         # Mark changes
         self.change_callback()
 
     def load_combined_test_cases(self, combined_test_cases):
         self.clear_canvas()
-        for block_data in combined_test_cases:
-            x, y, _, _ = block_data['coords']
-            text = block_data['type']
-            self.create_draggable_block(x, y, text)
-            new_block = self.blocks[-1]
-
-            if text in ["Input by", "Click", "Dropdown option", "Radio button", "Static content"]:
-                if text == "Static content":
-                    new_block[3].set(block_data['values'][0])
-                    new_block[5].set(block_data['values'][1])
-                    new_block[7].delete(0, tk.END)
-                    new_block[7].insert(0, block_data['values'][2])
-                    new_block[9].delete(0, tk.END)
-                    new_block[9].insert(0, block_data['values'][3])
-                else:
-                    new_block[5].set(block_data['values'][0])
-                    new_block[7].delete(0, tk.END)
-                    new_block[7].insert(0, block_data['values'][1])
-                    if text in ["Input by", "Dropdown option"]:
-                        new_block[9].delete(0, tk.END)
-                        new_block[9].insert(0, block_data['values'][2])
-            elif text == "Launch Web:":
-                new_block[3].delete(0, tk.END)
-                new_block[3].insert(0, block_data['values'][0])
-            elif text == "Delay:":
-                new_block[3].delete(0, tk.END)
-                new_block[3].insert(0, block_data['values'][0])
-            elif text == "Navigate":
-                new_block[3].set(block_data['values'][0])
-            elif text == "Database":
-                new_block[3].set(block_data['values'][0])  # Database type
-                new_block[5].delete(0, tk.END)  # Host
-                new_block[5].insert(0, block_data['values'][1])
-                new_block[7].delete(0, tk.END)  # Database Name
-                new_block[7].insert(0, block_data['values'][2])
-                new_block[9].delete(0, tk.END)  # Username
-                new_block[9].insert(0, block_data['values'][3])
-                new_block[11].delete(0, tk.END)  # Password
-                new_block[11].insert(0, block_data['values'][4])
-            elif text == "Retrieve data":
-                new_block[3].delete(0, tk.END)
-                new_block[3].insert(0, block_data['values'][0]) 
-                new_block[5].delete(0, tk.END)  # Host
-                new_block[5].insert(0, block_data['values'][1])
-                new_block[7].delete(0, tk.END)  # Database Name
-                new_block[7].insert(0, block_data['values'][2])
-                new_block[9].delete(0, tk.END)  # Username
-                new_block[9].insert(0, block_data['values'][3])
-                new_block[11].delete(0, tk.END)  # Password
-                new_block[11].insert(0, block_data['values'][4])
-                new_block[13].delete(0, tk.END)  # Database Name
-                new_block[13].insert(0, block_data['values'][5])
-                new_block[15].delete(0, tk.END)  # Username
-                new_block[15].insert(0, block_data['values'][6])
-                new_block[17].delete(0, tk.END)  # Password
-                new_block[17].insert(0, block_data['values'][7])
+        self.load_blocks(combined_test_cases)
         # Mark changes
         self.change_callback()
 
-    def run_test_case(self, test_case_file, webdriver_choice, driver=None):
-        self.load_test_case(test_case_file)
-        self.start_testing(webdriver_choice, driver)
+    def load_blocks(self, test_case_data):
+        for block_data in test_case_data:
+            x, y, _, _ = block_data['coords']
+            block = self.create_draggable_block(x, y, block_data['type'])
+            block.set_values(block_data['values'])
+
+    def run_test_case(self, test_case_file, webdriver_choice, driver=None, label=None):
+        # Runs straight from the saved JSON, the canvas is left untouched
+        name = os.path.basename(test_case_file)
+        label = label or name
+        progress = lambda step, total: self.report_progress(f"{label}: step {step} of {total}")
+        try:
+            steps = self.plan_cache.steps(test_case_file)
+        except Exception as e:
+            self.runner.log_with_timestamp(f"Error during testing: {e}")
+            return False
+        return self.run_steps(steps, webdriver_choice, driver, progress, name, test_case_file)
 
-    def run_test_suite(self, test_cases, webdriver_choice):
+    def run_test_suite(self, test_cases, webdriver_choice, workers=1, suite_file=None):
         if not test_cases:
             return
+        if self.is_running():
+            self.runner.log_with_timestamp("A run is already in progress.")
+            return
+        self.run_in_background(self.execute_suite, test_cases, webdriver_choice, workers, suite_file)
 
-        driver = None
-        if webdriver_choice == "Chrome":
-            driver = webdriver.Chrome()
-        elif webdriver_choice == "Edge":
-            driver = webdriver.Edge()
-        elif webdriver_choice == "Firefox":
-            driver = webdriver.Firefox()
-        else:
-            raise ValueError(f"Unsupported WebDriver choice: {webdriver_choice}")
+    def execute_suite(self, test_cases, webdriver_choice, workers, suite_file):
+        try:
+            self.execute_suite_cases(test_cases, webdriver_choice, workers, suite_file)
+        finally:
+            # Database connections do not outlive the suite
+            self.db_pool.close_all()
+            # The canvas and widget pool belong to the Tk thread, run_finished reads the stats there
+            self.suite_finished = True
+
+    def execute_suite_cases(self, test_cases, webdriver_choice, workers, suite_file):
+        suite_profile = RunProfile(os.path.basename(suite_file) if suite_file else "Test suite")
+        test_cases = self.schedule_suite(test_cases)
+        if not test_cases:
+            return
 
-        for test_case in test_cases:
-            self.run_test_case(test_case, webdriver_choice, driver)
+        if workers > 1:
+            progress = lambda done, total: self.report_progress(f"Suite: {done} of {total} test case(s) finished")
+            results = ParallelSuiteRunner(webdriver_choice, workers, self.logger, self.cancel_event, progress, self.session_pool, self.db_pool, self.plan_cache, self.result_store, self.batch_steps, self.cache_elements, self.launch_profile, self.artifacts).run(test_cases)
+            for result in results:
+                if result is not None:
+                    self.record_result(result["test_case"], result["passed"], result["duration"])
+                if result is not None and result["profile"] is not None:
+                    self.save_profile(result["profile"], result["test_case"], log_summary=False)
+                    suite_profile.merge(result["profile"])
+            self.save_profile(suite_profile, suite_file)
+            return
 
-        driver.quit()
+        # Test cases in a sequential suite share one session, as before
+        driver = self.session_pool.acquire(webdriver_choice, self.launch_profile)
+        try:
+            for index, test_case in enumerate(test_cases):
+                if self.cancel_event.is_set():
+                    break
+                self.runner.profile = None
+                passed = self.run_test_case(test_case, webdriver_choice, driver, f"{os.path.basename(test_case)} ({index + 1} of {len(test_cases)})")
+                if self.runner.profile is not None:
+                    self.save_profile(self.runner.profile, test_case, log_summary=False)
+                    suite_profile.merge(self.runner.profile)
+                if not passed and not self.session_pool.is_alive(driver):
+                    self.session_pool.release(driver, failed=True)
+                    driver = self.session_pool.acquire(webdriver_choice, self.launch_profile)
+        finally:
+            self.session_pool.release(driver)
+            self.driver = None
+        self.save_profile(suite_profile, suite_file)
 
     def clear_canvas(self):
-        for block in self.blocks:
-            self.canvas.delete(block[0])
-            self.canvas.delete(block[1])
-            if block[2] in ["Input by", "Click", "Dropdown option", "Radio button", "Static content"]:
-                if block[2] == "Static content":
-                    self.canvas.delete(block[4])
-                self.canvas.delete(block[6])
-                self.canvas.delete(block[8])
-                if block[2] in ["Input by", "Dropdown option", "Static content"]:
-                    self.canvas.delete(block[10])
-            elif block[2] == "Launch Web:":
-                self.canvas.delete(block[4])
-            elif block[2] == "Delay:":
-                self.canvas.delete(block[4])
-                self.canvas.delete(block[5])
-            elif block[2] == "Navigate":
-                self.canvas.delete(block[4])
-            elif block[2] == "Database":
-                self.canvas.delete(block[4])
-                self.canvas.delete(block[6])
-                self.canvas.delete(block[8])
-                self.canvas.delete(block[10])
-                self.canvas.delete(block[12])
-            elif block[2] == "Retrieve data":
-                self.canvas.delete(block[4])
-                self.canvas.delete(block[6])
-                self.canvas.delete(block[8])
-                self.canvas.delete(block[10])
-                self.canvas.delete(block[12])
-                self.canvas.delete(block[14])
-                self.canvas.delete(block[16])
-                self.canvas.delete(block[18])
+        for block in self.blocks.values():
+            self.dematerialize_block(block)
+            self.canvas.delete(block.tag)
         self.blocks.clear()
+        self.blocks_by_item.clear()
+        self.block_index.clear()
+        self.current_file = None
 
         # Mark changes
         self.change_callback()
@@ -0,0 +1,582 @@
+import threading
+import time
+import json
+import hashlib
+from run_profile import RunProfile
+from db_pool import ConnectionPool
+from blocks import BLOCK_TYPES
+from step_batch import BATCH_SCRIPT, ROUND_TRIPS, batch_group
+from element_cache import ElementCache
+from launch_profiles import LaunchProfile
+from visual import BaselineStore, baseline_name
+
+# Selenium's By values, spelled out so compiling a test case does not import selenium.
+# Selenium itself is loaded by the first run (create_driver) and the steps that need it.
+element_finders = {
+    "NAME": "name",
+    "ID": "id",
+    "CLASS_NAME": "class name",
+    "CSS_SELECTOR": "css selector",
+    "LINK_TEXT": "link text",
+    "PARTIAL_LINK_TEXT": "partial link text",
+    "TAG_NAME": "tag name",
+    "XPATH": "xpath",
+}
+
+# Defaults used when a "Wait until" block leaves its timeout or poll entry blank
+DEFAULT_WAIT_TIMEOUT = 10
+DEFAULT_WAIT_POLL = 0.25
+
+def create_driver(webdriver_choice, headless=False, profile=None):
+    # headless forces headless mode on top of whatever the launch profile says
+    from selenium import webdriver
+    profile = profile or LaunchProfile("Default")
+    if webdriver_choice == "Chrome":
+        return webdriver.Chrome(options=profile.apply(webdriver_choice, webdriver.ChromeOptions(), headless))
+    elif webdriver_choice == "Edge":
+        return webdriver.Edge(options=profile.apply(webdriver_choice, webdriver.EdgeOptions(), headless))
+    elif webdriver_choice == "Firefox":
+        return webdriver.Firefox(options=profile.apply(webdriver_choice, webdriver.FirefoxOptions(), headless))
+    raise ValueError(f"Unsupported WebDriver choice: {webdriver_choice}")
+
+def load_test_case_data(filename):
+    with open(filename, 'r') as file:
+        return json.load(file)
+
+# Position of the element type among each block's values
+LOCATOR_FIELDS = {
+    "Input by": 0,
+    "Dropdown option": 0,
+    "Click": 0,
+    "Radio button": 0,
+    "Static content": 1,
+    "Wait until": 1,
+}
+
+def compile_test_case(test_case_data):
+    # Steps run top to bottom, the same order the blocks have on the canvas
+    ordered_blocks = sorted(test_case_data, key=lambda block_data: block_data['coords'][1])
+    steps = [compile_step(index + 1, block_data['type'], block_data.get('values', [])) for index, block_data in enumerate(ordered_blocks)]
+
+    # A setup fixture covers the steps above its marker, a snapshot is reused only while they hash the same
+    for index, step in enumerate(steps):
+        if step.block_type == "Setup fixture":
+            fixture_steps = [[fixture_step.block_type, fixture_step.values] for fixture_step in steps[:index]]
+            step.digest = hashlib.sha256(json.dumps(fixture_steps).encode('utf-8')).hexdigest()
+            break
+    return steps
+
+def compile_step(number, block_type, values):
+    # Values are checked and parsed once here, the runner only reads the results
+    step = Step(block_type, values)
+    block = BLOCK_TYPES.get(block_type)
+    if block is None:
+        # Unknown blocks are skipped by the runner, as they always were
+        return step
+    if len(step.values) != len(block.FIELDS):
+        raise ValueError(f"Step {number} ({block_type}) has {len(step.values)} value(s), expected {len(block.FIELDS)}")
+
+    if block_type in LOCATOR_FIELDS:
+        step.by = element_finders.get(step.values[LOCATOR_FIELDS[block_type]])
+    if block_type == "Delay:":
+        delay = step.values[0]
+        try:
+            step.delay = int(delay) if delay else None
+        except ValueError:
+            raise ValueError(f"Step {number} (Delay:): '{delay}' is not a whole number of seconds")
+    elif block_type == "Retrieve data":
+        step.sql, step.parameters = build_select(step.values)
+    elif block_type == "Setup fixture":
+        name = step.values[0]
+        step.fixture = name if name and name != "fixture name" else "setup"
+    elif block_type == "Wait until":
+        _, _, _, expected, timeout, poll = step.values
+        try:
+            step.timeout = float(timeout) if timeout and timeout != "Timeout (s)" else DEFAULT_WAIT_TIMEOUT
+            step.poll = float(poll) if poll and poll != "Poll (s)" else DEFAULT_WAIT_POLL
+        except ValueError:
+            raise ValueError(f"Step {number} (Wait until): timeout and poll must be numbers of seconds")
+        step.expected = "" if expected == "text / URL" else expected
+    return step
+
+def describe_locator(step):
+    # "ID=username" for steps that find an element, None for the rest
+    position = LOCATOR_FIELDS.get(step.block_type)
+    if position is None or not step.by:
+        return None
+    return f"{step.values[position]}={step.values[position + 1]}"
+
+def build_select(values):
+    select, table, column1, column2, column3, value1, value2, value3 = values
+
+    # Check conditions for optional parameters
+    col3_needed = not (value3 == "" or value3 == "Value 3" or column3 == "" or column3 == "WHERE column3")
+    col2_needed = not (value2 == "" or value2 == "Value 2" or column2 == "" or column2 == "WHERE column2")
+
+    # Construct SQL query based on needed columns
+    if col3_needed and col2_needed:
+        sql_query = f"SELECT {select} FROM {table} WHERE {column1} = %s AND {column2} = %s AND {column3} = %s"
+        parameters = (value1, value2, value3)
+    elif col2_needed:
+        sql_query = f"SELECT {select} FROM {table} WHERE {column1} = %s AND {column2} = %s"
+        parameters = (value1, value2)
+    else:
+        sql_query = f"SELECT {select} FROM {table} WHERE {column1} = %s"
+        parameters = (value1,)
+    return sql_query, parameters
+
+class Step:
+    # by, delay, sql/parameters, timeout/poll/expected and fixture/digest are filled in when compiling
+    def __init__(self, block_type, values):
+        self.block_type = block_type
+        self.values = list(values)
+        self.by = None
+        self.delay = None
+        self.sql = None
+        self.parameters = None
+        self.timeout = None
+        self.poll = None
+        self.expected = None
+        self.fixture = None
+        self.digest = None
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data):
+        step = cls(data['block_type'], data['values'])
+        step.__dict__.update(data)
+        if step.parameters is not None:
+            step.parameters = tuple(step.parameters)
+        return step
+
+class TestRunner:
+    def __init__(self, logger, db_pool=None, result_store=None, batch_steps=False, cache_elements=False, fixtures=None, artifacts=None):
+        self.logger = logger
+        self.batch_steps = batch_steps  # Look up the elements of runs of text and image verifications in one script
+        self.cache_elements = cache_elements  # Reuse element handles while the page stays the same
+        self.element_cache = None
+        self.fixtures = fixtures  # Setup fixture snapshots, None runs fixture steps every time
+        self.fixture_steps = []
+        self.fixture_snapshot = None
+        self.failed_before_step = False
+        self.result_store = result_store  # Receives a record for every finished step and test case
+        self.artifacts = artifacts  # Captures the page when a step fails, None captures nothing
+        self.driver = None
+        self.db_pool = db_pool or ConnectionPool()
+        self.connection = None
+        self.failed = False
+        self.failure = None
+        self.cancel_event = threading.Event()
+        self.profile = None
+        self.current_step = None
+        self.step_log = None
+        self.batch_stats = {"scripts": 0, "steps": 0, "saved": 0}
+        self.baselines = BaselineStore()  # Screenshot baselines for visual static content checks
+
+        self.actions = {
+            "Input by": self.run_input,
+            "Dropdown option": self.run_input,
+            "Click": self.run_click,
+            "Radio button": self.run_click,
+            "Static content": self.run_static_content,
+            "Launch Web:": self.run_launch_web,
+            "Navigate": self.run_navigate,
+            "Delay:": self.run_delay,
+            "Database": self.run_database,
+            "Retrieve data": self.run_retrieve_data,
+            "Wait until": self.run_wait_until,
+            "Setup fixture": self.run_setup_fixture,
+        }
+
+    def run(self, steps, driver, cancel_event=None, progress=None, test_case="Test case", profile=None):
+        # Returns False if a step raised, a verification did not match or the run was stopped
+        self.driver = driver
+        self.failed = False
+        self.failure = None  # Message of the first step that failed, for reports
+        self.cancel_event = cancel_event or threading.Event()
+        self.profile = profile or RunProfile(test_case)
+        self.batch_stats = {"scripts": 0, "steps": 0, "saved": 0}
+        self.element_cache = ElementCache() if self.cache_elements else None
+        started = time.perf_counter()
+        wall_started = time.time()
+        try:
+            index = self.prepare_fixture(steps)
+            while index < len(steps):
+                # Stop requests are honoured between steps
+                if self.cancel_event.is_set():
+                    break
+                group = batch_group(steps, index) if self.batch_steps else []
+                if len(group) > 1:
+                    # The script runs as part of the first step, the rest only read their results
+                    results = []
+                    for offset, (step, _) in enumerate(group):
+                        if progress:
+                            progress(index + offset + 1, len(steps))
+                        self.run_step(test_case, index + offset + 1, step, lambda step, offset=offset: self.run_batched(group, results, offset))
+                    index += len(group)
+                    continue
+
+                step = steps[index]
+                if progress:
+                    progress(index + 1, len(steps))
+                action = self.actions.get(step.block_type)
+                if action:
+                    self.run_step(test_case, index + 1, step, action)
+                index += 1
+            if self.cancel_event.is_set():
+                self.failed = True
+                self.log_with_timestamp("Run stopped.")
+        except Exception as e:
+            self.failed = True
+            self.failure = self.failure or f"Error during testing: {e}"
+            self.log_with_timestamp(f"Error during testing: {e}")
+        finally:
+            # The connection goes back to the pool for the next test case
+            self.release_connection()
+        if self.batch_stats["scripts"]:
+            self.log_with_timestamp(f"Batched {self.batch_stats['steps']} step(s) into {self.batch_stats['scripts']} script call(s), saving {self.batch_stats['saved']} WebDriver round-trip(s).")
+        self.profile.add_test_case(test_case, time.perf_counter() - started, not self.failed)
+        if self.result_store is not None:
+            self.result_store.add_test_case(test_case, not self.failed, wall_started, time.time())
+        return not self.failed
+
+    def run_step(self, test_case, number, step, action):
+        self.current_step = self.profile.start_step(test_case, number, step.block_type)
+        self.step_log = []
+        # failed is cleared for the step so its own outcome can be recorded
+        failed_before, self.failed = self.failed, False
+        self.failed_before_step = failed_before
+        error = None
+        step_started = time.perf_counter()
+        step_wall_started = time.time()
+        try:
+            action(step)
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.profile.finish_step(self.current_step, time.perf_counter() - step_started)
+            self.current_step = None
+            self.record_step(test_case, number, step, step_wall_started, error)
+            if error is not None or self.failed:
+                self.capture_failure(test_case, number, step, error)
+            if self.element_cache is not None:
+                if step.block_type in ["Launch Web:", "Navigate", "Setup fixture"]:
+                    self.element_cache.clear()
+                elif step.block_type != "Static content":
+                    # Anything but a verification may have changed the page
+                    self.element_cache.mark_dirty()
+            self.failed = self.failed or failed_before
+
+    def capture_failure(self, test_case, number, step, error):
+        if self.artifacts is None or self.driver is None:
+            return
+        try:
+            path = self.artifacts.capture(self.driver, test_case, number, step.block_type, error)
+            self.log_with_timestamp(f"Saving failure artifacts to {path}.*")
+        except Exception as e:
+            self.log_with_timestamp(f"Failed to capture failure artifacts: {e}")
+
+    def prepare_fixture(self, steps):
+        # Returns the index to start from, past the fixture steps when a snapshot can be restored
+        self.fixture_steps = []
+        self.fixture_snapshot = None
+        if self.fixtures is None:
+            return 0
+        for index, step in enumerate(steps):
+            if step.block_type == "Setup fixture":
+                self.fixture_steps = steps[:index]
+                self.fixture_snapshot = self.fixtures.get(self.driver, step.fixture, step.digest)
+                return index if self.fixture_snapshot is not None else 0
+        return 0
+
+    def run_setup_fixture(self, step):
+        if self.fixtures is None:
+            return
+        name = step.fixture
+        if self.fixture_snapshot is not None:
+            snapshot, self.fixture_snapshot = self.fixture_snapshot, None
+            try:
+                self.fixtures.restore(self.driver, snapshot)
+                self.log_with_timestamp(f"Restored setup fixture '{name}', skipped {len(self.fixture_steps)} step(s).")
+                return
+            except Exception as e:
+                # Fall back to running the fixture steps, then take a fresh snapshot
+                self.log_with_timestamp(f"Could not restore setup fixture '{name}', running its steps: {e}")
+                for fixture_step in self.fixture_steps:
+                    action = self.actions.get(fixture_step.block_type)
+                    if action:
+                        action(fixture_step)
+                if self.failed:
+                    return
+        elif self.failed_before_step:
+            # A fixture that did not get through cleanly is not worth reusing
+            return
+        self.fixtures.capture(self.driver, name, step.digest)
+        self.log_with_timestamp(f"Saved setup fixture '{name}' after {len(self.fixture_steps)} step(s).")
+
+    def run_batched(self, group, results, offset):
+        if offset == 0:
+            operations = [operation for _, operation in group]
+            results.extend(self.driver.execute_script(BATCH_SCRIPT, operations))
+            # The script stops at the first element it cannot find, only completed reads count
+            completed = [operation for operation, result in zip(operations, results) if "error" not in result]
+            self.batch_stats["scripts"] += 1
+            self.batch_stats["steps"] += len(completed)
+            self.batch_stats["saved"] += max(0, sum(ROUND_TRIPS[operation["kind"]] for operation in completed) - 1)
+        step, operation = group[offset]
+        result = results[offset]
+        if "error" in result:
+            from selenium.common.exceptions import NoSuchElementException
+            raise NoSuchElementException(result["error"])
+
+        if operation["kind"] == "text":
+            self.check_content(step, result["element"].text)
+        else:
+            self.check_content(step, result["value"])
+
+    def record_step(self, test_case, index, step, started, error):
+        log, self.step_log = self.step_log, None
+        if (error or self.failed) and self.failure is None:
+            self.failure = f"Step {index} ({step.block_type}): {error or (log[-1] if log else 'failed')}"
+        if self.result_store is None:
+            return
+        if error:
+            outcome = "error"
+        elif self.cancel_event.is_set():
+            outcome = "stopped"
+        elif self.failed:
+            outcome = "failed"
+        else:
+            outcome = "passed"
+        self.result_store.add_step(test_case, index, step.block_type, describe_locator(step), outcome, started, time.time(), error, log)
+
+    def find_element(self, by_type, element_identifier):
+        started = time.perf_counter()
+        try:
+            if self.element_cache is None:
+                return self.driver.find_element(by_type, element_identifier)
+            element, hit = self.element_cache.find(self.driver, by_type, element_identifier)
+            self.profile.count("element_cache_hits" if hit else "element_cache_misses")
+            return element
+        finally:
+            self.record("locate", started)
+
+    def use_element(self, by_type, element_identifier, use):
+        from selenium.common.exceptions import StaleElementReferenceException
+        element = self.find_element(by_type, element_identifier)
+        try:
+            return use(element)
+        except StaleElementReferenceException:
+            if self.element_cache is None:
+                raise
+            # The page changed under a cached handle, look the element up again
+            self.element_cache.discard(by_type, element_identifier)
+            self.profile.count("element_cache_stale")
+            return use(self.find_element(by_type, element_identifier))
+
+    def record(self, phase, started):
+        if self.current_step is not None:
+            self.current_step[phase] += time.perf_counter() - started
+
+    def run_input(self, step):
+        element_type, element_identifier, query = step.values
+        if element_type and element_identifier and query:
+            by_type = step.by
+            if by_type:
+                if step.block_type == "Input by":
+                    self.use_element(by_type, element_identifier, lambda element: self.type_into(element, query))
+                else:
+                    from selenium.webdriver.support.ui import Select
+                    self.use_element(by_type, element_identifier, lambda element: Select(element).select_by_visible_text(query))
+                self.log_with_timestamp(f"Input '{query}' into element found by {element_type} with identifier '{element_identifier}'.")
+
+    def type_into(self, element, query):
+        element.clear()
+        element.send_keys(query)
+
+    def run_click(self, step):
+        element_type, element_identifier = step.values
+        if element_type and element_identifier:
+            by_type = step.by
+            if by_type:
+                self.use_element(by_type, element_identifier, lambda element: element.click())
+                if step.block_type == "Click":
+                    self.log_with_timestamp(f"Clicked on element found by {element_type} with identifier '{element_identifier}'.")
+                else:
+                    self.log_with_timestamp(f"Clicked radio button found by {element_type} with identifier '{element_identifier}'.")
+
+    def run_static_content(self, step):
+        content_type, element_type, element_identifier, query = step.values
+        by_type = step.by
+        if by_type:
+            # Each property is read once, a mismatch reuses the value for the log
+            if content_type == "Text":
+                self.check_content(step, self.use_element(by_type, element_identifier, lambda element: element.text))
+            elif content_type in ["Image", "Icon"]:
+                self.check_content(step, self.use_element(by_type, element_identifier, lambda element: element.get_attribute('src')))
+            elif content_type == "Visual":
+                self.check_visual(step, self.use_element(by_type, element_identifier, lambda element: element.screenshot_as_png))
+
+    def check_visual(self, step, screenshot):
+        content_type, element_type, element_identifier, query = step.values
+        name = baseline_name(query, element_type, element_identifier)
+        passed, message = self.baselines.check(name, screenshot)
+        if passed:
+            self.log_with_timestamp(f"Verified visual '{name}' of element found by {element_type} with identifier '{element_identifier}': {message}.")
+        else:
+            self.failed = True
+            self.log_with_timestamp(f"Visual mismatch for '{name}' in element found by {element_type} with identifier '{element_identifier}': {message}.")
+
+    def check_content(self, step, actual):
+        content_type, element_type, element_identifier, query = step.values
+        if content_type == "Text":
+            if actual == query:
+                self.log_with_timestamp(f"Verified text '{query}' in element found by {element_type} with identifier '{element_identifier}'.")
+            else:
+                self.failed = True
+                self.log_with_timestamp(f"Text mismatch: expected '{query}', found '{actual}' in element found by {element_type} with identifier '{element_identifier}'.")
+        else:
+            if actual == query:
+                self.log_with_timestamp(f"Verified {content_type.lower()} '{query}' in element found by {element_type} with identifier '{element_identifier}'.")
+            else:
+                self.failed = True
+                self.log_with_timestamp(f"Source mismatch: expected '{query}', found '{actual}' in element found by {element_type} with identifier '{element_identifier}'.")
+
+    def run_launch_web(self, step):
+        url = step.values[0]
+        if url:
+            self.driver.get(url)
+            self.log_with_timestamp(f"Launched {url}.")
+
+    def run_navigate(self, step):
+        navigation_action = step.values[0]
+        if navigation_action == "Backward":
+            self.driver.back()
+            self.log_with_timestamp("Navigated backward.")
+        elif navigation_action == "Forward":
+            self.driver.forward()
+            self.log_with_timestamp("Navigated forward.")
+        elif navigation_action == "Refresh":
+            self.driver.refresh()
+            self.log_with_timestamp("Page refreshed.")
+
+    def run_delay(self, step):
+        if step.delay is not None:
+            # Waits on the cancel event so a Stop does not have to sit out the delay
+            if self.cancel_event.wait(step.delay):
+                return
+            self.log_with_timestamp(f"Delay for {step.values[0]} seconds.")
+
+    def run_wait_until(self, step):
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+        condition, element_type, element_identifier, _, _, _ = step.values
+        timeout, poll, expected = step.timeout, step.poll, step.expected
+
+        locator = (step.by, element_identifier)
+        if condition == "Element present":
+            predicate = EC.presence_of_element_located(locator)
+            description = f"element found by {element_type} with identifier '{element_identifier}' to be present"
+        elif condition == "Element visible":
+            predicate = EC.visibility_of_element_located(locator)
+            description = f"element found by {element_type} with identifier '{element_identifier}' to be visible"
+        elif condition == "Element clickable":
+            predicate = EC.element_to_be_clickable(locator)
+            description = f"element found by {element_type} with identifier '{element_identifier}' to be clickable"
+        elif condition == "Element gone":
+            predicate = EC.invisibility_of_element_located(locator)
+            description = f"element found by {element_type} with identifier '{element_identifier}' to be gone"
+        elif condition == "Text present":
+            predicate = EC.text_to_be_present_in_element(locator, expected)
+            description = f"text '{expected}' in element found by {element_type} with identifier '{element_identifier}'"
+        elif condition == "URL changes":
+            # With an expected value the URL has to contain it, otherwise any change will do
+            if expected:
+                predicate = EC.url_contains(expected)
+                description = f"URL to contain '{expected}'"
+            else:
+                predicate = EC.url_changes(self.driver.current_url)
+                description = "URL to change"
+        else:
+            raise ValueError(f"Unsupported wait condition: {condition}")
+
+        # Polls like WebDriverWait, but sleeps on the cancel event so Stop still works
+        started = time.perf_counter()
+        while True:
+            try:
+                if predicate(self.driver):
+                    break
+            except (NoSuchElementException, StaleElementReferenceException):
+                pass
+            elapsed = time.perf_counter() - started
+            if elapsed >= timeout:
+                self.failed = True
+                self.log_with_timestamp(f"Timed out after {elapsed:.2f}s waiting for {description}.")
+                return
+            if self.cancel_event.wait(min(poll, timeout - elapsed)):
+                return
+
+        elapsed = time.perf_counter() - started
+        self.log_with_timestamp(f"Waited {elapsed:.2f}s for {description} (timeout {timeout:g}s).")
+
+    def run_database(self, step):
+        db_type, host, dbname, username, password = step.values
+        connection_details = {
+            "host": host,
+            "dbname": dbname,
+            "username": username,
+            "password": password
+        }
+        self.connect_to_database(db_type, connection_details)
+
+    def run_retrieve_data(self, step):
+        self.retrieve_data(step.sql, step.parameters)
+
+    def connect_to_database(self, db_type, connection_details):
+        # The password stays out of the log, step logs end up in result files and CI output
+        self.log_with_timestamp(f"Connecting to {db_type} database {connection_details['dbname']} on {connection_details['host']} as {connection_details['username']}.")
+        # Hand the previous connection back instead of leaking it
+        self.release_connection()
+        started = time.perf_counter()
+        try:
+            self.connection, reused = self.db_pool.acquire(db_type, connection_details)
+            self.record("db_connect", started)
+            if reused:
+                self.log_with_timestamp(f"Reusing pooled connection to {db_type} database.")
+            else:
+                self.log_with_timestamp(f"Connected to {db_type} database.")
+        except Exception as e:
+            self.record("db_connect", started)
+            self.failed = True
+            self.log_with_timestamp(f"Failed to connect to {db_type} database: {e}")
+
+    def release_connection(self):
+        if self.connection is not None:
+            self.db_pool.release(self.connection)
+            self.connection = None
+
+    def retrieve_data(self, sql_query, parameters):
+        try:
+            # Parameter values are left out of the log, they may hold credentials or personal data
+            self.log_with_timestamp(f"Executing SQL query: {sql_query} ({len(parameters)} parameter(s))")
+            started = time.perf_counter()
+            with self.connection.cursor() as cursor:
+                cursor.execute(sql_query, parameters)
+                result = cursor.fetchone()  # or use cursor.fetchall() if you expect multiple rows
+            self.record("db_query", started)
+            if result:
+                self.log_with_timestamp("Data retrieved successfully.")
+            else:
+                self.log_with_timestamp("No data found.")
+        except Exception as e:
+            self.failed = True
+            self.log_with_timestamp(f"Failed to retrieve data: {e}")
+
+    def log_with_timestamp(self, message):
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+        if self.step_log is not None:
+            self.step_log.append(message)
+        self.logger(f"[{timestamp}] {message}")
@@ -10,7 +10,7 @@ class TestSuiteManager:
         self.test_suites_folder = test_suites_folder
         self.test_suites = {}
 
-    def new_suite(self, parent, webdriver_var, test_app):
+    def new_suite(self, parent, webdriver_var, test_app, workers_var):
         suite_name = simpledialog.askstring("Input", "Enter new suite name:", parent=parent)
         if suite_name:
             self.test_suites[suite_name] = []
@@ -36,7 +36,7 @@ class TestSuiteManager:
                         with open(suite_file_path, 'r') as file:
                             test_cases = json.load(file)
                         webdriver_choice = webdriver_var.get()
-                        test_app.run_test_suite(test_cases, webdriver_choice)
+                        test_app.run_test_suite(test_cases, webdriver_choice, workers_var.get(), suite_file_path)
                     else:
                         messagebox.showerror("Error", "Suite not found", parent=parent)
     def edit_suite(self, parent):
@@ -54,13 +54,13 @@ class TestSuiteManager:
         else:
             messagebox.showerror("Error", "Suite not found", parent=parent)
 
-    def run_suite(self, test_app, webdriver_var, parent):
+    def run_suite(self, test_app, webdriver_var, parent, workers_var):
         suite_file_path = fd.askopenfilename(title="Select Test Suite File", filetypes=[("JSON files", "*.json")], initialdir=self.test_suites_folder)
         if suite_file_path:
             with open(suite_file_path, 'r') as file:
                 test_cases = json.load(file)
             webdriver_choice = webdriver_var.get()
-            test_app.run_test_suite(test_cases, webdriver_choice)
+            test_app.run_test_suite(test_cases, webdriver_choice, workers_var.get(), suite_file_path)
         else:
             messagebox.showerror("Error", "Suite not found", parent=parent)
 
@@ -0,0 +1,189 @@
+import io
+import json
+import os
+import re
+import threading
+
+# Screenshots are compared against projects/Baselines/<name>.png. <name>.json holds the
+# settings for a baseline and is written with the defaults the first time it is saved:
+#   tolerance  perceptual colour distance (0-255) still treated as the same colour
+#   threshold  fraction of compared pixels allowed to be further apart than tolerance before
+#              the check fails
+#   masks      [x, y, width, height] rectangles that are ignored, e.g. a clock or a carousel
+BASELINES_FOLDER = os.path.join("projects", "Baselines")
+DEFAULT_TOLERANCE = 8
+DEFAULT_THRESHOLD = 0.001
+
+# The colour distance is the YIQ-weighted difference of Kotsarenko and Ramos, also used by
+# pixelmatch: brightness counts about twice as much as hue, so anti-aliasing and slight colour
+# shifts matter less than an edge that moved. Rows are the RGB to Y, I and Q weights times the
+# square root of their weight in the distance, scaled so black against white is about 246 and
+# the largest possible distance 255. The distance is never larger than the largest channel
+# difference, so rows without a channel difference above tolerance are not converted at all.
+PERCEPTUAL_WEIGHTS = [
+    [0.29889531 * 0.71084, 0.58662247 * 0.71084, 0.11448223 * 0.71084],
+    [0.59597799 * 0.54681, -0.27417610 * 0.54681, -0.32180189 * 0.54681],
+    [0.21147017 * 0.44238, -0.52261711 * 0.44238, 0.31114694 * 0.44238],
+]
+MAX_PERCEPTUAL_DELTA = 35215
+
+# Rows compared at a time. Bands small enough to stay in cache roughly halve the time of
+# whole-array operations. Decoding the PNG costs far more than comparing, which is why check()
+# compares the encoded bytes first.
+BAND_ROWS = 32
+
+def baseline_name(query, element_type, element_identifier):
+    # The input field names the baseline, otherwise it is named after the locator
+    name = query if query and query != "input" else f"{element_type}_{element_identifier}"
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "baseline"
+
+def load_image(data):
+    # numpy and Pillow are only needed once a visual check runs
+    try:
+        import numpy
+        from PIL import Image
+    except ImportError:
+        raise RuntimeError("Visual verification needs numpy and Pillow (pip install numpy pillow)")
+    with Image.open(io.BytesIO(data) if isinstance(data, bytes) else data) as image:
+        return numpy.asarray(image.convert("RGB"))
+
+def save_image(pixels, path):
+    from PIL import Image
+    Image.fromarray(pixels).save(path)
+
+def compare(actual, baseline, tolerance, masks):
+    # Returns (changed pixel mask, changed fraction). The largest channel difference is found on
+    # uint8 first (max - min, so nothing is widened, then strided views rather than reducing an
+    # axis), the perceptual distance is only computed for bands where it rules nothing out
+    import numpy
+    height, width = actual.shape[:2]
+    # One mask of the compared pixels, overlapping ignore rectangles are only left out once.
+    # Rectangles are clipped to the image, negative slice bounds would mask the wrong area.
+    compared = None
+    if masks:
+        compared = numpy.ones((height, width), dtype=bool)
+        for x, y, mask_width, mask_height in masks:
+            left, top = max(0, x), max(0, y)
+            right, bottom = min(width, x + mask_width), min(height, y + mask_height)
+            if left < right and top < bottom:
+                compared[top:bottom, left:right] = False
+
+    # Squared distances are compared so no square root is taken per pixel
+    weights = numpy.array(PERCEPTUAL_WEIGHTS, dtype=numpy.float32) * numpy.float32(255 / MAX_PERCEPTUAL_DELTA ** 0.5)
+    limit = numpy.float32(tolerance) ** 2
+
+    changed = numpy.empty((height, width), dtype=bool)
+    difference = numpy.empty((BAND_ROWS, width, 3), dtype=numpy.uint8)
+    smaller = numpy.empty_like(difference)
+    largest = numpy.empty((BAND_ROWS, width), dtype=numpy.uint8)
+    signed = numpy.empty((BAND_ROWS, width, 3), dtype=numpy.float32)
+    distance = numpy.empty((BAND_ROWS, width), dtype=numpy.float32)
+    for top in range(0, height, BAND_ROWS):
+        rows = min(BAND_ROWS, height - top)
+        band, low, most = difference[:rows], smaller[:rows], largest[:rows]
+        numpy.maximum(actual[top:top + rows], baseline[top:top + rows], out=band)
+        numpy.minimum(actual[top:top + rows], baseline[top:top + rows], out=low)
+        band -= low
+        numpy.maximum(band[..., 0], band[..., 1], out=most)
+        numpy.maximum(most, band[..., 2], out=most)
+        candidates = changed[top:top + rows]
+        numpy.greater(most, tolerance, out=candidates)
+        if compared is not None:
+            candidates &= compared[top:top + rows]
+        if not candidates.any():
+            continue
+        # The whole band is converted, gathering only the candidates is slower than that
+        delta, squared = signed[:rows], distance[:rows]
+        numpy.subtract(actual[top:top + rows], baseline[top:top + rows], out=delta, dtype=numpy.float32)
+        squared[...] = 0
+        for component in weights:
+            projected = delta @ component
+            projected *= projected
+            squared += projected
+        candidates &= squared > limit
+
+    total = changed.size if compared is None else numpy.count_nonzero(compared)
+    return changed, numpy.count_nonzero(changed) / max(total, 1)
+
+def diff_image(actual, changed):
+    # Dimmed actual screenshot with the changed pixels in red
+    pixels = actual // 3
+    pixels[changed] = (255, 0, 0)
+    return pixels
+
+class BaselineStore:
+    def __init__(self, folder=BASELINES_FOLDER):
+        self.folder = folder
+        self.lock = threading.Lock()
+        self.cache = {}  # Baselines by name, reloaded when the file changes
+
+    def paths(self, name):
+        stem = os.path.join(self.folder, name)
+        return {"baseline": f"{stem}.png", "settings": f"{stem}.json", "actual": f"{stem}.actual.png", "diff": f"{stem}.diff.png"}
+
+    def settings(self, name):
+        settings = {"tolerance": DEFAULT_TOLERANCE, "threshold": DEFAULT_THRESHOLD, "masks": []}
+        try:
+            with open(self.paths(name)["settings"], 'r') as file:
+                settings.update(json.load(file))
+        except (OSError, ValueError):
+            pass
+        return settings
+
+    def baseline(self, name):
+        # The encoded baseline, None until one has been saved
+        path = self.paths(name)["baseline"]
+        if not os.path.exists(path):
+            return None
+        mtime = os.path.getmtime(path)
+        with self.lock:
+            cached = self.cache.get(name)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+        with open(path, 'rb') as file:
+            data = file.read()
+        with self.lock:
+            self.cache[name] = (mtime, data, None)
+        return data
+
+    def baseline_pixels(self, name, data):
+        # Decoded by the first check that needs it and kept next to the encoded baseline
+        with self.lock:
+            cached = self.cache.get(name)
+        if cached is not None and cached[1] is data and cached[2] is not None:
+            return cached[2]
+        pixels = load_image(data)
+        with self.lock:
+            if cached is not None and cached[1] is data:
+                self.cache[name] = (cached[0], data, pixels)
+        return pixels
+
+    def check(self, name, screenshot):
+        # Returns (passed, message)
+        paths = self.paths(name)
+        baseline = self.baseline(name)
+        if baseline is None:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(paths["baseline"], 'wb') as file:
+                file.write(screenshot)
+            with open(paths["settings"], 'w') as file:
+                json.dump(self.settings(name), file, indent=2)
+            return True, f"saved new baseline {paths['baseline']}"
+
+        # Browsers encode the same pixels to the same PNG, an unchanged element needs no decoding
+        if screenshot == baseline:
+            return True, "identical to baseline"
+        actual = load_image(screenshot)
+        baseline = self.baseline_pixels(name, baseline)
+        if actual.shape != baseline.shape:
+            save_image(actual, paths["actual"])
+            return False, f"size {actual.shape[1]}x{actual.shape[0]} differs from baseline {baseline.shape[1]}x{baseline.shape[0]}, actual saved to {paths['actual']}"
+
+        settings = self.settings(name)
+        changed, fraction = compare(actual, baseline, settings["tolerance"], settings["masks"])
+        summary = f"{fraction:.4%} of compared pixels differ by more than {settings['tolerance']} perceptually (threshold {settings['threshold']:.4%})"
+        if fraction <= settings["threshold"]:
+            return True, summary
+        save_image(actual, paths["actual"])
+        save_image(diff_image(actual, changed), paths["diff"])
+        return False, f"{summary}, diff saved to {paths['diff']}"